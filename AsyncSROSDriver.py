@@ -0,0 +1,457 @@
+#!/usr/bin/env python
+
+import asyncio
+import copy
+import functools
+import hashlib
+import os
+import re
+import time
+
+import asyncssh
+
+from napalm_base.exceptions import CommandTimeoutException, ConnectionClosedException
+
+from SROSConfig import bgp_config, vprn_ids
+from SROSDriver import (EXEC_DONE_RE, INTERFACE_NAMES_CMD, VPRN_SERVICE_RE, ConfigDiff, ExecReport,
+                        InterfaceTable, PromptScanner, RollbackIndex, SROSDriver, cpu_time, file_md5)
+from SROSRecords import ArpEntry, BgpNeighbor, BgpNeighborDetail, ConfigHunk, Interface, RollbackEntry, shape
+
+
+def async_cached_result(getter):
+    """Coroutine counterpart of SROSDriver.cached_result."""
+    @functools.wraps(getter)
+    async def wrapper(self, *args, **kwargs):
+        if self.cache is None:
+            return await getter(self, *args, **kwargs)
+        key = (getter.__name__, args, tuple(sorted(kwargs.items())))
+        result = self.cache.get(key)
+        if result is not None:
+            return copy.deepcopy(result)
+        result = await getter(self, *args, **kwargs)
+        if result is not None:
+            self.cache.set(key, copy.deepcopy(result))
+        return result
+    return wrapper
+
+
+def async_snapshot(getter):
+    """Coroutine counterpart of SROSDriver.snapshot."""
+    @functools.wraps(getter)
+    async def wrapper(self, *args, **kwargs):
+        result = await getter(self, *args, **kwargs)
+        self._store_snapshot(getter.__name__, args, kwargs, result)
+        return result
+    return wrapper
+
+
+def async_instrumented(getter):
+    """Coroutine counterpart of SROSDriver.instrumented."""
+    @functools.wraps(getter)
+    async def wrapper(self, *args, **kwargs):
+        if not self.instrumentation or self._getter is not None:
+            return await getter(self, *args, **kwargs)
+        self._getter = getter.__name__
+        start = time.time()
+        try:
+            return await getter(self, *args, **kwargs)
+        finally:
+            self._getter = None
+            self._emit('getter', getter=getter.__name__, duration=time.time() - start)
+    return wrapper
+
+
+class AsyncSROSDriver(SROSDriver):
+    """SROSDriver getters as coroutines over an asyncssh shell session.
+
+    Only the channel I/O differs: commands, prompt detection and every
+    `_parse_*` helper are inherited from SROSDriver, so both drivers return
+    the same structures. One event loop can drive many sessions at once.
+    """
+
+    def __init__(self, hostname, username, password, timeout=60, optional_args=None):
+        super(AsyncSROSDriver, self).__init__(hostname, username, password, timeout, optional_args)
+        self.conn = None
+
+    async def open(self):
+        start = time.time()
+        self.conn = await asyncssh.connect(self.hostname, port=self.port, username=self.username,
+                                           password=self.password, known_hosts=None)
+        self._emit('connect', duration=time.time() - start, reused=False)
+        self.device = await self.conn.create_process(term_type='vt100')
+        await self._read_until_prompt()
+        await self.command('/environment no more')
+
+    async def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            await self.conn.wait_closed()
+
+    async def command(self, cmd):
+        cmd = self._with_newline(cmd)
+        output = self._cached_command(cmd)
+        if output is None:
+            output = await self._exchange(cmd)
+            self._store_command(cmd, output)
+        return output
+
+    async def command_batch(self, cmds):
+        return await self._command_batch(cmds)
+
+    async def _command_batch(self, cmds, invalidate=True):
+        cmds = [self._with_newline(cmd) for cmd in cmds]
+        outputs = [self._cached_command(cmd) for cmd in cmds]
+        missing = [i for i, output in enumerate(outputs) if output is None]
+        for batch in self._batches(missing):
+            text = ''.join(cmds[i] for i in batch)
+            output = await self._exchange(text, invalidate=invalidate)
+            for i, block in zip(batch, self._split_batch_output([cmds[i] for i in batch], output)):
+                outputs[i] = block
+                self._store_command(cmds[i], block)
+        return outputs
+
+    async def _exchange(self, text, invalidate=True):
+        if invalidate:
+            self._invalidate_on_config(text)
+        start = time.time()
+        self.device.stdin.write(text)
+        output = await self._read_until_prompt(prompts=text.count('\n'))
+        self._emit_command(text, len(output), time.time() - start)
+        return output
+
+    async def _stream_lines(self, text, until=None, timeout=None, idle_timeout=None):
+        """Async generator counterpart of SROSDriver._stream_lines."""
+        self._invalidate_on_config(text)
+        start = time.time()
+        self.device.stdin.write(text)
+        scanner = PromptScanner(text.count('\n'), until=until, keep=False)
+        chunks = self._recv_chunks(timeout, idle_timeout)
+        size = 0
+        done = False
+        try:
+            async for data in chunks:
+                size += len(data)
+                done = scanner.feed(data)
+                for line in scanner.lines:
+                    yield line
+                if done:
+                    break
+        finally:
+            if not done:
+                async for data in chunks:
+                    size += len(data)
+                    if scanner.feed(data):
+                        break
+            self._emit_command(text, size, time.time() - start)
+
+    async def _read_until_prompt(self, prompts=1):
+        scanner = PromptScanner(prompts)
+        async for data in self._recv_chunks():
+            if scanner.feed(data):
+                return scanner.output()
+
+    async def _recv_chunks(self, timeout=None, idle_timeout=None):
+        timeout = timeout or self.timeout
+        idle_timeout = idle_timeout or self.idle_timeout
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + timeout
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise CommandTimeoutException(
+                    '{}: no prompt after {}s'.format(self.hostname, timeout))
+            try:
+                data = await asyncio.wait_for(self.device.stdout.read(self.read_size),
+                                              min(idle_timeout, remaining))
+            except asyncio.TimeoutError:
+                raise CommandTimeoutException(
+                    '{}: no output for {}s while waiting for prompt'.format(self.hostname, idle_timeout))
+            if not data:
+                raise ConnectionClosedException('{}: channel closed'.format(self.hostname))
+            yield data
+
+    @async_instrumented
+    async def scp_file_put(self, source_file, dest_file):
+        await asyncssh.scp(source_file, (self.conn, dest_file))
+
+    @async_instrumented
+    async def scp_file_get(self, dest_file):
+        await asyncssh.scp((self.conn, dest_file), '.')
+
+    async def open_sftp(self):
+        return await self.conn.start_sftp_client()
+
+    @async_instrumented
+    async def put_file(self, source_file, dest_file, md5=None):
+        """Coroutine counterpart of SROSDriver.put_file, over this driver's connection."""
+        start = time.time()
+        size = os.stat(source_file).st_size
+        output = await self.command('file dir {}'.format(dest_file))
+        remote_size = None
+        if 'CLI File Not Found' not in output:
+            remote_size = self._dir_size(output)
+        else:
+            output = await self.command('file dir')
+        sent = 0
+        if remote_size == size and await self._remote_md5(dest_file) == (md5 or file_md5(source_file)):
+            status = 'skipped'
+        elif self._free_bytes(output) + (remote_size or 0) < size:
+            status = 'no_space'
+        else:
+            await self.scp_file_put(source_file, dest_file)
+            status = 'copied'
+            sent = size
+        duration = time.time() - start
+        return {'status': status, 'bytes': sent, 'duration': duration,
+                'throughput': sent / duration if sent else 0.0}
+
+    async def _remote_md5(self, dest_file):
+        """MD5 of a file on the device, read over SFTP and hashed here."""
+        digest = hashlib.md5()
+        async with self.conn.start_sftp_client() as sftp:
+            async with sftp.open(dest_file, 'rb') as remote:
+                while True:
+                    block = await remote.read(1 << 20)
+                    if not block:
+                        break
+                    digest.update(block)
+        return digest.hexdigest()
+
+    @async_instrumented
+    @async_snapshot
+    @async_cached_result
+    async def get_interfaces(self):
+        output = await self.command('/show router interface exclude-services')
+        return shape(Interface, self._parse_interfaces(output), self.result_format)
+
+    async def iter_interfaces(self):
+        rows = self._iter_parsed('/show router interface exclude-services\n', InterfaceTable())
+        try:
+            async for row in rows:
+                yield (row.name, dict(zip(row._fields[1:], row[1:]))) if self.result_format == 'dict' else row
+        finally:
+            await rows.aclose()
+
+    @async_instrumented
+    @async_snapshot
+    async def get_facts(self):
+        system, names = await self.command_batch(['/show system information\n/show chassis detail\n',
+                                                  INTERFACE_NAMES_CMD])
+        facts = self._parse_facts(system)
+        facts['interface'] = self._parse_interface_names(names)
+        return facts
+
+    @async_instrumented
+    @async_snapshot
+    @async_cached_result
+    async def get_arp_table(self):
+        return shape(ArpEntry, [entry async for entry in self._iter_arp_records()], self.result_format)
+
+    async def iter_arp_table(self):
+        records = self._iter_arp_records()
+        try:
+            async for entry in records:
+                yield dict(zip(entry._fields, entry)) if self.result_format == 'dict' else entry
+        finally:
+            await records.aclose()
+
+    async def _iter_arp_records(self):
+        lines = self._stream_lines('/show router arp\n')
+        timing = bool(self.instrumentation)
+        cpu = wall = 0.0
+        try:
+            async for arp_entry in lines:
+                if timing:
+                    start, cpu_start = time.time(), cpu_time()
+                entry = self._parse_arp_entry(arp_entry.rstrip('\r'))
+                if timing:
+                    cpu += cpu_time() - cpu_start
+                    wall += time.time() - start
+                if entry is not None:
+                    yield entry
+        finally:
+            # async generators are not closed when the caller stops early,
+            # close it here so the rest of the table is drained now
+            await lines.aclose()
+            self._emit('parse', parser='_parse_arp_table', duration=cpu, wall=wall)
+
+    @async_instrumented
+    @async_snapshot
+    @async_cached_result
+    async def get_bgp_config(self, group='', neighbor='', vrf=''):
+        if vrf == 'all':
+            return await self._get_bgp_config_all(group, neighbor)
+        if self.config_index:
+            return self._select_bgp_config(bgp_config(await self.get_config_index(), vrf), group, neighbor)
+        bgp_n_parms = await self._get_bgp_neighbors_config(vrf)
+        bgp_gr_response = await self.command('/show router {} bgp group\n'.format(vrf))
+        return self._join_bgp_config(bgp_n_parms, bgp_gr_response, group, neighbor)
+
+    async def _get_bgp_config_all(self, group='', neighbor=''):
+        vrfs = await self._vrf_list()
+        if self.config_index:
+            index = await self.get_config_index()
+            return dict((vrf or 'global', self._select_bgp_config(bgp_config(index, vrf), group, neighbor))
+                        for vrf in vrfs)
+        outputs = await self.command_batch(self._bgp_config_all_commands(vrfs))
+        return self._join_bgp_config_all(vrfs, outputs, group, neighbor)
+
+    async def _vrf_list(self):
+        if self.config_index:
+            return [''] + vprn_ids(await self.get_config_index())
+        return [''] + VPRN_SERVICE_RE.findall(await self.command('/show service service-using vprn\n'))
+
+    @async_cached_result
+    async def _get_bgp_neighbors_config(self, vrf=''):
+        bgp_response = await self.command('/show router {} bgp neighbor\n'.format(vrf))
+        return self._parse_bgp_neighbors_config(bgp_response)
+
+    @async_instrumented
+    @async_snapshot
+    @async_cached_result
+    async def get_bgp_neighbors(self, vrf=''):
+        if vrf == 'all':
+            vrfs = await self._vrf_list()
+            outputs = await self.command_batch(self._bgp_neighbors_all_commands(vrfs))
+            return self._parse_bgp_neighbors_all(vrfs, outputs)
+        bgp_response = await self.command('/show router {} bgp summary\n'.format(vrf))
+        if bgp_response:
+            bgp_n_parms = await self._get_bgp_neighbors_config(vrf)
+            return shape(BgpNeighbor, self._parse_bgp_neighbors(bgp_response, bgp_n_parms, vrf),
+                         self.result_format, vrf=vrf or 'global')
+
+    @async_instrumented
+    @async_snapshot
+    @async_cached_result
+    async def get_bgp_config_detail(self, neighbor='', vrf=''):
+        if vrf == 'all':
+            vrfs = await self._vrf_list()
+            summaries = await self.command_batch(['/show router {} bgp summary\n'.format(vrf) for vrf in vrfs])
+            peer_vrfs, neighbors = self._summary_peers(vrfs, summaries, neighbor)
+            return self._shape_detail_all(vrfs, peer_vrfs, await self._get_bgp_neigh_detail(neighbors, vrf=peer_vrfs))
+        bgp_response = await self.command('/show router {} bgp summary\n'.format(vrf))
+        neighbors = re.findall(r'^(\d+.\d+.\d+.\d+)', bgp_response, re.M)
+        if neighbor:
+            neighbors = [neighbor]
+        bgp_details = await self._get_bgp_neigh_detail(neighbors, vrf=vrf)
+        return shape(BgpNeighborDetail, bgp_details, self.result_format)
+
+    @async_instrumented
+    async def get_bgp_neighbors_delta(self, vrf=''):
+        bgp_response = await self.command('/show router {} bgp summary\n'.format(vrf))
+        snapshot = self._delta_snapshot('get_bgp_neighbors', vrf)
+        bgp_n_parms = dict((peer, {'remote_as': row.remote_as}) for peer, row in snapshot['rows'].items())
+        if any(peer not in bgp_n_parms for peer in self._summary_records(bgp_response)):
+            bgp_n_parms = await self._get_bgp_neighbors_config(vrf)
+        rows = self._parse_bgp_neighbors(bgp_response, bgp_n_parms, vrf)
+        return self._delta(BgpNeighbor, snapshot, rows, vrf=vrf or 'global')
+
+    @async_instrumented
+    async def get_bgp_config_detail_delta(self, vrf=''):
+        summary = self._summary_records(await self.command('/show router {} bgp summary\n'.format(vrf)))
+        snapshot = self._delta_snapshot('get_bgp_config_detail', vrf)
+        stale = [peer for peer, record in summary.items()
+                 if snapshot['summary'].get(peer) != record or peer not in snapshot['rows']]
+        fetched = dict((row.peer, row) for row in await self._get_bgp_neigh_detail(stale, vrf=vrf))
+        rows = [fetched[peer] if peer in fetched else snapshot['rows'][peer] for peer in summary]
+        snapshot['summary'] = summary
+        return self._delta(BgpNeighborDetail, snapshot, rows)
+
+    async def _get_bgp_neigh_detail(self, neighbors_list, vrf=''):
+        details = await self.command_batch(self._bgp_detail_commands(neighbors_list, vrf))
+        if self.config_index:
+            neighbor_policies = self._index_policies(await self.get_config_index(), neighbors_list, vrf)
+        else:
+            policy_checks = await self._command_batch(self._bgp_policy_commands(neighbors_list, details, vrf),
+                                                      invalidate=False)
+            neighbor_policies = [(self._policy_search('import', policy_check),
+                                  self._policy_search('export', policy_check))
+                                 for policy_check in policy_checks]
+        return self._parse_bgp_neigh_detail(neighbors_list, details, neighbor_policies)
+
+    @async_instrumented
+    async def get_config_index(self, refresh=False):
+        if self._config_index is None or refresh:
+            self._config_index = self._parse_config(await self.command('admin display-config'))
+        return self._config_index
+
+    @async_instrumented
+    async def check_file_exists(self, dest_file):
+        output = await self.command('file dir {}'.format(dest_file))
+        return 'CLI File Not Found' not in output
+
+    @async_instrumented
+    async def delete_file(self, dest_file):
+        output = await self.command('file delete {} force'.format(dest_file))
+        return 'OK' in output
+
+    @async_instrumented
+    async def check_free_space(self, source_file):
+        output = await self.command('file dir')
+        return self._has_free_space(output, source_file)
+
+    @async_instrumented
+    async def rollback_save(self):
+        output = await self.command('admin rollback save')
+        return 'OK' in output
+
+    @async_instrumented
+    async def rollback_view(self):
+        entries = [entry async for entry in self._iter_parsed('admin rollback view\n', RollbackIndex())]
+        return shape(RollbackEntry, entries, self.result_format)
+
+    async def iter_rollback_view(self):
+        entries = self._iter_parsed('admin rollback view\n', RollbackIndex())
+        try:
+            async for entry in entries:
+                yield dict(zip(entry._fields, entry)) if self.result_format == 'dict' else entry
+        finally:
+            await entries.aclose()
+
+    @async_instrumented
+    async def rollback_compare(self, rollback_id):
+        hunks = [hunk async for hunk in self._iter_parsed(self._rollback_compare_command(rollback_id), ConfigDiff())]
+        return shape(ConfigHunk, hunks, self.result_format)
+
+    async def iter_rollback_compare(self, rollback_id):
+        hunks = self._iter_parsed(self._rollback_compare_command(rollback_id), ConfigDiff())
+        try:
+            async for hunk in hunks:
+                yield ConfigHunk.to_napalm([hunk])[0] if self.result_format == 'dict' else hunk
+        finally:
+            await hunks.aclose()
+
+    async def _iter_parsed(self, text, parser):
+        lines = self._stream_lines(text)
+        try:
+            async for line in lines:
+                record = parser.feed(line)
+                if record is not None:
+                    yield record
+        finally:
+            await lines.aclose()
+        record = parser.close()
+        if record is not None:
+            yield record
+
+    @async_instrumented
+    async def exec_file(self, dest_file, progress=None):
+        return (await self.exec_file_report(dest_file, progress))['output']
+
+    @async_instrumented
+    async def exec_file_report(self, dest_file, progress=None, size=None):
+        if size is None:
+            size = await self._file_size(dest_file)
+        timeout, idle_timeout = self._exec_timeouts(size)
+        report = ExecReport(progress)
+        lines = self._stream_lines('exec -echo {}\n'.format(dest_file), until=EXEC_DONE_RE,
+                                   timeout=timeout, idle_timeout=idle_timeout)
+        try:
+            async for text in lines:
+                report.feed(text)
+        finally:
+            await lines.aclose()
+        return report.result()
+
+    async def _file_size(self, dest_file):
+        return self._dir_size(await self.command('file dir {}'.format(dest_file)))
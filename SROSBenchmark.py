@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+
+import argparse
+import gc
+import re
+import time
+
+from SROSDriver import SROSDriver
+from SROSFakeDevice import SROSFakeDevice, synthetic_bgp, synthetic_interfaces, synthetic_transcript
+from SROSRecords import RESULT_FORMATS, Interface
+
+GETTERS = ['get_facts', 'get_interfaces', 'get_arp_table', 'get_bgp_config',
+           'get_bgp_neighbors', 'get_bgp_config_detail']
+BULK_GETTERS = ['get_interfaces', 'get_arp_table', 'get_bgp_neighbors', 'get_bgp_config_detail']
+
+
+class _RunTotals(object):
+    """Instrumentation listener summing round trips, bytes read and parse CPU time of the current run."""
+
+    def __init__(self):
+        self.reset()
+
+    def __call__(self, event):
+        if event['event'] == 'command':
+            self.round_trips += 1
+            self.bytes_read += event['bytes']
+        elif event['event'] == 'parse':
+            self.parse_time += event['duration']
+
+    def reset(self):
+        self.round_trips = 0
+        self.bytes_read = 0
+        self.parse_time = 0.0
+
+
+def benchmark(transcript, getters=GETTERS, repeat=1, latency=0, jitter=0, optional_args=None, vrf=None):
+    """Run each getter against a SROSFakeDevice replaying `transcript` and return one row per run.
+
+    `vrf` is passed to the BGP getters.
+    """
+    rows = []
+    with SROSFakeDevice(transcript, latency=latency, jitter=jitter) as device:
+        totals = _RunTotals()
+        args = dict(optional_args or {}, port=device.port, instrumentation=totals)
+        driver = SROSDriver('127.0.0.1', 'admin', 'admin', optional_args=args)
+        driver.open()
+        try:
+            for getter in getters:
+                for _ in range(repeat):
+                    totals.reset()
+                    start = time.time()
+                    kwargs = {'vrf': vrf} if vrf is not None and getter.startswith('get_bgp') else {}
+                    getattr(driver, getter)(**kwargs)
+                    rows.append({
+                        'getter': getter,
+                        'wall': time.time() - start,
+                        'round_trips': totals.round_trips,
+                        'bytes_read': totals.bytes_read,
+                        'parse': totals.parse_time,
+                        })
+        finally:
+            driver.close()
+    return rows
+
+
+def memory_benchmark(transcript, getters=BULK_GETTERS, formats=RESULT_FORMATS, optional_args=None):
+    """Return the memory retained by each getter result for every `result_format`.
+
+    The fake device runs in the same process; its buffers are released once
+    the answer is sent, so what remains allocated is the result itself.
+    """
+    import tracemalloc
+    rows = []
+    with SROSFakeDevice(transcript) as device:
+        for result_format in formats:
+            args = dict(optional_args or {}, port=device.port, result_format=result_format)
+            driver = SROSDriver('127.0.0.1', 'admin', 'admin', optional_args=args)
+            driver.open()
+            try:
+                for getter in getters:
+                    gc.collect()
+                    tracemalloc.start()
+                    try:
+                        before = tracemalloc.get_traced_memory()[0]
+                        result = getattr(driver, getter)()
+                        gc.collect()
+                        retained, peak = tracemalloc.get_traced_memory()
+                    finally:
+                        tracemalloc.stop()
+                    rows.append({
+                        'getter': getter,
+                        'format': result_format,
+                        'retained': retained - before,
+                        'peak': peak - before,
+                        })
+                    del result
+            finally:
+                driver.close()
+    return rows
+
+
+def regex_interfaces(driver, output):
+    """The interface table parser SROSDriver used before the header offsets: a regex search per field."""
+    def records(lines):
+        rules = 0
+        pending = None
+        for line in lines:
+            if '----' in line:
+                rules += 1
+                if pending is not None:
+                    yield pending + '\n'
+                    pending = None
+            elif rules != 1:
+                continue
+            elif pending is not None:
+                if line.strip('\r'):
+                    yield pending + '\n' + line
+                    pending = None
+                else:
+                    pending += '\n' + line
+            elif re.match(r'\w', line):
+                pending = line
+        if pending is not None:
+            yield pending + '\n'
+
+    search = driver._search_func
+    rows = []
+    for iface in records(output.split('\n')):
+        rows.append(Interface(search(r'^(.{1,32})', iface).rstrip(), search(r'.{33}(\w+)', iface),
+                              search(r'.{43}(\w+)', iface), search(r'.{43}\w+/(\w+)', iface),
+                              search(r'.{55}(\w+)', iface), search(r'\s+(\d+.\d+.\d+.\d+/\d+)', iface),
+                              search(r'.{63}(.+)[\r\n]+', iface).rstrip()))
+    return rows
+
+
+def parse_benchmark(sizes=(1000, 10000, 100000), repeat=3):
+    """Time the interface table parser alone on synthetic tables of each size (best of `repeat`),
+    next to regex_interfaces() on the same tables."""
+    driver = SROSDriver('127.0.0.1', 'admin', 'admin')
+    parsers = (('parse', driver._parse_interfaces), ('regex', lambda output: regex_interfaces(driver, output)))
+    rows = []
+    for size in sizes:
+        output = synthetic_interfaces(size)
+        row = {'interfaces': size}
+        for name, parse in parsers:
+            best = None
+            for _ in range(repeat):
+                start = time.time()
+                parse(output)
+                elapsed = time.time() - start
+                best = elapsed if best is None else min(best, elapsed)
+            row[name] = best
+        row['per_interface'] = row['parse'] / size
+        row['speedup'] = row['regex'] / row['parse']
+        rows.append(row)
+    return rows
+
+
+def split_benchmark(sizes=(1000, 2500, 5000, 10000), repeat=3):
+    """Time the BGP section splitters alone on neighbor, group and summary output of each size
+    (best of `repeat`); every peer is in its own group."""
+    driver = SROSDriver('127.0.0.1', 'admin', 'admin')
+    splitters = (('neighbor', 'show router bgp neighbor', driver._get_bgp_neighbors_section),
+                 ('group', 'show router bgp group', driver._get_bgp_group_section),
+                 ('summary', 'show router bgp summary', driver._get_bgp_summary_section))
+    rows = []
+    for size in sizes:
+        transcript = synthetic_bgp(size, groups=size)
+        row = {'peers': size}
+        for name, command, splitter in splitters:
+            output = transcript[command]
+            best = None
+            for _ in range(repeat):
+                start = time.time()
+                splitter(output)
+                elapsed = time.time() - start
+                best = elapsed if best is None else min(best, elapsed)
+            row[name] = best
+        row['per_peer'] = sum(row[name] for name, _, _ in splitters) / size
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SROSDriver getters against a fake SR OS device.')
+    parser.add_argument('--interfaces', type=int, default=1000)
+    parser.add_argument('--arp', type=int, default=10000)
+    parser.add_argument('--peers', type=int, default=200)
+    parser.add_argument('--vrfs', type=int, default=0, help='VPRN services on the fake device')
+    parser.add_argument('--vrf-peers', type=int, default=4, help='BGP peers in each VPRN')
+    parser.add_argument('--vrf', help="vrf passed to the BGP getters, e.g. 'all'")
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every answer')
+    parser.add_argument('--jitter', type=float, default=0.0, help='random extra seconds per answer')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--getter', action='append', dest='getters', help='getter to run (default: all)')
+    parser.add_argument('--memory', action='store_true',
+                        help='compare memory held by the results of each result_format instead')
+    parser.add_argument('--parse', type=int, nargs='+', metavar='SIZE',
+                        help='time only the interface table parser on tables of these sizes')
+    parser.add_argument('--split', type=int, nargs='+', metavar='PEERS',
+                        help='time only the BGP section splitters on output with these numbers of peers')
+    args = parser.parse_args()
+    if args.parse:
+        print('{:>12} {:>10} {:>16} {:>10} {:>8}'.format(
+            'interfaces', 'parse s', 'us / interface', 'regex s', 'speedup'))
+        for row in parse_benchmark(args.parse):
+            print('{interfaces:>12} {parse:>10.3f} {0:>16.2f} {regex:>10.3f} {speedup:>7.1f}x'.format(
+                row['per_interface'] * 1e6, **row))
+        return
+    if args.split:
+        print('{:>8} {:>12} {:>10} {:>12} {:>12}'.format('peers', 'neighbor s', 'group s', 'summary s', 'us / peer'))
+        for row in split_benchmark(args.split):
+            print('{peers:>8} {neighbor:>12.4f} {group:>10.4f} {summary:>12.4f} {0:>12.2f}'.format(
+                row['per_peer'] * 1e6, **row))
+        return
+    transcript = synthetic_transcript(args.interfaces, args.arp, args.peers, vrfs=args.vrfs, vrf_peers=args.vrf_peers)
+    if args.memory:
+        rows = memory_benchmark(transcript, args.getters or BULK_GETTERS)
+        print('{:<24} {:<8} {:>14} {:>14}'.format('getter', 'format', 'retained MB', 'peak MB'))
+        for row in rows:
+            print('{getter:<24} {format:<8} {0:>14.2f} {1:>14.2f}'.format(
+                row['retained'] / 1e6, row['peak'] / 1e6, **row))
+        return
+    rows = benchmark(transcript, args.getters or GETTERS, args.repeat, args.latency, args.jitter, vrf=args.vrf)
+    print('{:<24} {:>9} {:>11} {:>12} {:>12}'.format('getter', 'wall s', 'round trips', 'bytes read', 'parse cpu s'))
+    for row in rows:
+        print('{getter:<24} {wall:>9.3f} {round_trips:>11} {bytes_read:>12} {parse:>12.3f}'.format(**row))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+"""Index of the running configuration as printed by `admin display-config`.
+
+The classic CLI prints the configuration as indented contexts closed by
+`exit`; the same context may be opened several times (e.g. `router Base` for
+interfaces and again for BGP). parse_config() folds it into one ConfigNode
+tree where every context appears once, so lookups are dict walks.
+"""
+
+import re
+
+from collections import OrderedDict
+
+TOKEN_RE = re.compile(r'"[^"]*"|\S+')
+
+
+class ConfigNode(object):
+    """One CLI context (or leaf command); children are keyed by their line without a trailing `create`."""
+
+    __slots__ = ('line', 'children')
+
+    def __init__(self, line=''):
+        self.line = line
+        self.children = OrderedDict()
+
+    def child(self, line):
+        node = self.children.get(line)
+        if node is None:
+            node = self.children[line] = ConfigNode(line)
+        return node
+
+    def get(self, *path):
+        node = self
+        for line in path:
+            node = node.children.get(line)
+            if node is None:
+                return None
+        return node
+
+    def find(self, *words):
+        """Children whose line starts with `words`, e.g. find('vprn', '100') or find('group')."""
+        prefix = ' '.join(words)
+        return [node for line, node in self.children.items()
+                if line == prefix or line.startswith(prefix + ' ')]
+
+    def first(self, *words):
+        nodes = self.find(*words)
+        return nodes[0] if nodes else None
+
+    def words(self):
+        return TOKEN_RE.findall(self.line)
+
+    def name(self):
+        """Second word of the line unquoted, e.g. the group of `group "RR"`."""
+        words = self.words()
+        return words[1].strip('"') if len(words) > 1 else ''
+
+    def values(self, keyword):
+        """Arguments of the leaf command `keyword` in this context (quotes kept), or None when not configured."""
+        node = self.first(keyword)
+        return None if node is None else node.words()[1:]
+
+    def value(self, keyword, default=None):
+        values = self.values(keyword)
+        return values[0].strip('"') if values else default
+
+    def has(self, keyword):
+        return self.first(keyword) is not None
+
+
+def parse_config(text):
+    """Fold `admin display-config` output into a ConfigNode tree in one pass over the lines."""
+    root = ConfigNode()
+    stack = [(-1, root)]
+    for raw in text.splitlines():
+        line = raw.rstrip()
+        stripped = line.lstrip()
+        if not stripped or stripped.startswith(('#', 'echo ')) or stripped in ('exit', 'exit all'):
+            continue
+        indent = len(line) - len(stripped)
+        while stack[-1][0] >= indent:
+            stack.pop()
+        if stripped.endswith(' create'):
+            stripped = stripped[:-len(' create')]
+        node = stack[-1][1].child(stripped)
+        stack.append((indent, node))
+    return root.get('configure') or root
+
+
+def bgp_context(root, vrf=''):
+    """The `bgp` context of the base router, or of VPRN `vrf`."""
+    if vrf:
+        service = root.get('service')
+        vprn = service.first('vprn', str(vrf)) if service is not None else None
+        return vprn.get('bgp') if vprn is not None else None
+    router = root.get('router Base') or root.get('router')
+    return router.get('bgp') if router is not None else None
+
+
+def vprn_ids(root):
+    """Service ids of the configured VPRNs, as strings."""
+    service = root.get('service')
+    return [node.words()[1] for node in service.find('vprn')] if service is not None else []
+
+
+def router_as(root, vrf=''):
+    if vrf:
+        service = root.get('service')
+        context = service.first('vprn', str(vrf)) if service is not None else None
+    else:
+        context = root.get('router Base') or root.get('router')
+    value = context.value('autonomous-system') if context is not None else None
+    return int(value) if value and value.isdigit() else 0
+
+
+def bgp_neighbors(root, vrf=''):
+    """Neighbor contexts of every BGP group, by peer address."""
+    bgp = bgp_context(root, vrf)
+    if bgp is None:
+        return {}
+    return dict((neighbor.name(), neighbor) for group in bgp.find('group') for neighbor in group.find('neighbor'))
+
+
+def policies(node):
+    """Import and export policies configured directly on `node`, as lists of quoted names or False."""
+    if node is None:
+        return False, False
+    return node.values('import') or False, node.values('export') or False
+
+
+def bgp_config(root, vrf=''):
+    """get_bgp_config() groups with their neighbors, built from the configuration.
+
+    Unset values are filled the way `show router bgp group/neighbor` prints
+    them, and AS numbers are inherited from group, bgp and router contexts.
+    """
+    bgp = bgp_context(root, vrf)
+    if bgp is None:
+        return {}
+    bgp_as = _int(bgp.value('local-as'), router_as(root, vrf))
+    bgp_cluster = bgp.has('cluster')
+    groups = {}
+    for group in bgp.find('group'):
+        parms = {
+            'description': group.value('description', ''),
+            'type': group.value('type', ''),
+            'multihop_ttl': _int(group.value('multihop'), 0),
+            'multipath': _int(bgp.value('multipath'), 0),
+            'import_policy': _policy_text(group.values('import')),
+            'export_policy': _policy_text(group.values('export')),
+            'local_address': group.value('local-address', ''),
+            'local_as': _int(group.value('local-as'), bgp_as),
+            'remote_as': _int(group.value('peer-as'), 0),
+            'remove_private_as': group.has('remove-private') or bgp.has('remove-private'),
+            'prefix_limit': _prefix_limit(group),
+            }
+        auth = group.value('auth-keychain', 'n/a')
+        cluster = bgp_cluster or group.has('cluster')
+        nhs = group.has('next-hop-self')
+        neighbors = {}
+        for neighbor in group.find('neighbor'):
+            neighbors[neighbor.name()] = {
+                'bgp_group': group.name(),
+                'description': neighbor.value('description', '(Not Specified)'),
+                'import_policy': _policy_text(neighbor.values('import')),
+                'export_policy': _policy_text(neighbor.values('export')),
+                'local_address': neighbor.value('local-address') or parms['local_address'],
+                'local_as': _int(neighbor.value('local-as'), parms['local_as']),
+                'remote_as': _int(neighbor.value('peer-as'), parms['remote_as']),
+                'authentication_key': neighbor.value('auth-keychain', auth),
+                'prefix_limit': _prefix_limit(neighbor) or parms['prefix_limit'],
+                'route_reflector_client': cluster or neighbor.has('cluster'),
+                'nhs': nhs or neighbor.has('next-hop-self'),
+                }
+        parms['neighbors'] = neighbors
+        groups[group.name()] = parms
+    return groups
+
+
+def _policy_text(values):
+    if not values:
+        return 'None Specified / Inherited'
+    return ' '.join(value.strip('"') for value in values)
+
+
+def _prefix_limit(node):
+    values = node.values('prefix-limit') or []
+    limits = [value for value in values if value.isdigit()]
+    return int(limits[0]) if limits else 0
+
+
+def _int(value, default):
+    return int(value) if value and value.isdigit() else default
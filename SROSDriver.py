@@ -1,13 +1,534 @@
 #!/usr/bin/env python
 
-import datetime
+import binascii
+import codecs
+import copy
+import functools
+import hashlib
 import os
 import re
+import socket
 import paramiko
+import threading
 import time
 
+from collections import OrderedDict
+from napalm_base.exceptions import CommandTimeoutException, ConnectionClosedException
 from scp import SCPClient
 
+from SROSConfig import bgp_config, bgp_neighbors, parse_config, policies, vprn_ids
+from SROSRecords import (RESULT_FORMATS, ArpEntry, AddressFamily, BgpNeighbor, BgpNeighborDetail,
+                         ConfigHunk, Interface, RollbackEntry, shape, to_napalm)
+from SROSSnapshots import snapshot_key
+
+# CPU time of the calling thread (of the process before Python 3.7), so parse timings do not include
+# time spent waiting for the device or running other threads of a fleet.
+try:
+    cpu_time = time.thread_time
+except AttributeError:
+    cpu_time = getattr(time, 'process_time', None) or time.clock
+
+# Classic CLI prompt, e.g. "A:SR-A#", "*A:SR-A>config>router>bgp# " or "B:SR-A$".
+PROMPT_RE = re.compile(r'^\r*\*?[AB]:[^\s#$]+[#$]')
+PROMPT_END_RE = re.compile(r'^\r*\*?[AB]:[^\s#$]+[#$] ?$')
+PROMPT_LINE_RE = re.compile(r'^\r*\*?[AB]:[^\s#$]+[#$] ?', re.M)
+ARP_ENTRY_RE = re.compile(r'^(\d+.\d+.\d+.\d+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(.*)')
+
+# Read-only commands whose output may be cached, and commands that change the configuration.
+SHOW_RE = re.compile(r'^\s*/?show\b')
+CONFIG_CHANGE_RE = re.compile(r'^\s*/?(configure|exec|admin rollback (save|revert))\b', re.M)
+
+# Lines opening one record in the BGP neighbor, group and summary outputs.
+BGP_NEIGHBOR_START_RE = re.compile(r'^Peer\s+:\s\d+.\d+.\d+.\d+', re.M)
+BGP_GROUP_START_RE = re.compile(r'^Group\s+:\s.*', re.M)
+BGP_SUMMARY_START_RE = re.compile(r'^\d+.\d+.\d+.\d+', re.M)
+
+# Service id column of `show service service-using vprn`.
+VPRN_SERVICE_RE = re.compile(r'^(\d+)\s+VPRN\b', re.M)
+
+# exec: completion and failure messages of SR OS itself (anchored, so echoed file lines never end the run),
+# error lines, and the size line of `file dir <file>`. SR OS stops at the first error, so the run is over
+# once the prompt is back after either the completion message or an error line (e.g. a file it cannot open).
+EXEC_EXECUTED_RE = re.compile(r'^\r*(?:INFO: CLI )?Executed (\d+) lines?\b')
+EXEC_FAILED_LINE_RE = re.compile(r'^\r*(?:MINOR|MAJOR|CRITICAL|Error): CLI .*\bfailed\b.*\bat line (\d+)')
+EXEC_ERROR_RE = re.compile(r'^\s*(MINOR|MAJOR|CRITICAL|Error):')
+EXEC_DONE_RE = re.compile('|'.join((EXEC_EXECUTED_RE.pattern, EXEC_ERROR_RE.pattern)))
+FILE_SIZE_RE = re.compile(r'File\(s\)\s+(\d+) bytes')
+FILE_FREE_RE = re.compile(r'(\d+) bytes free')
+
+
+def file_md5(source):
+    """Hex MD5 of a local path or an open binary file, read in 1 MB blocks."""
+    if not hasattr(source, 'read'):
+        with open(source, 'rb') as f:
+            return file_md5(f)
+    digest = hashlib.md5()
+    for block in iter(lambda: source.read(1 << 20), b''):
+        digest.update(block)
+    return digest.hexdigest()
+
+
+def _to_int(value):
+    return int(value) if value.isdigit() else None
+
+
+def _is_present(value):
+    return True
+
+
+def _is_enabled(value):
+    return value != 'Disabled'
+
+
+def _column_offsets(header):
+    """Start offset of every column of a table header line, e.g. [0, 33, 43, 55, 63]."""
+    return [match.start() for match in re.finditer(r'\S+', header)]
+
+
+def _field_table(*fields):
+    """Compile (name, label, value pattern, converter, default) rows into a single `label : value` scanner.
+
+    Each row becomes one alternative with a named group, so one finditer pass
+    over a record visits every field in the order it appears in the text.
+    """
+    pattern = '|'.join(r'{}\s*:\s(?P<{}>{})'.format(label, name, value)
+                       for name, label, value, _, _ in fields)
+    return re.compile(pattern), fields
+
+
+IP = r'\d+.\d+.\d+.\d+'
+
+BGP_NEIGHBOR_FIELDS = _field_table(
+    ('bgp_group', 'Group', '.*', str, ''),
+    ('description', 'Description', '.*', str, ''),
+    ('import_policy', 'Import Policy', '.*', str, ''),
+    ('export_policy', 'Export Policy', '.*', str, ''),
+    ('local_address', 'Local Address', IP, str, ''),
+    ('local_as', 'Local AS', r'\S+', _to_int, 0),
+    ('remote_as', 'Peer AS', r'\S+', _to_int, 0),
+    ('authentication_key', 'Auth key chain', r'\S+', str, ''),
+    ('prefix_limit', 'Prefix Limit', r'\S+', _to_int, 0),
+    ('route_reflector_client', 'Cluster Id', IP, _is_present, False),
+    ('nhs', 'Next Hop Self', 'Enabled', _is_present, False),
+    ('peer', 'Peer', IP, str, ''),
+)
+
+BGP_GROUP_FIELDS = _field_table(
+    ('description', 'Description', '.*', str, ''),
+    ('type', 'Group Type', r'\w+', str, ''),
+    ('multihop_ttl', 'Multihop', r'\d+', _to_int, 0),
+    ('multipath', 'Multipath', r'\d+', _to_int, 0),
+    ('import_policy', 'Import Policy', '.*', str, ''),
+    ('export_policy', 'Export Policy', '.*', str, ''),
+    ('local_address', 'Local Address', IP, str, ''),
+    ('local_as', 'Local AS', r'\S+', _to_int, 0),
+    ('remote_as', 'Peer AS', r'\S+', _to_int, 0),
+    ('remove_private_as', 'Remove Private', r'\S+', _is_enabled, False),
+    ('prefix_limit', 'Prefix Limit', r'\S+', _to_int, 0),
+    ('group', 'Group', '.*', str, ''),
+)
+
+BGP_DETAIL_FIELDS = _field_table(
+    ('connection_state', 'State', r'\w+', str, ''),
+    ('previous_connection_state', 'Last State', r'\w+', str, ''),
+    ('last_event', 'Last Event', r'\w+', str, ''),
+    ('local_as', 'Local AS', r'\S+', _to_int, 0),
+    ('remote_as', 'Peer AS', r'\S+', _to_int, 0),
+    ('local_address', 'Local Address', IP, str, ''),
+    ('remote_add', 'Peer Address', IP, str, ''),
+    ('loc_port', 'Local Port', r'\d+', _to_int, 0),
+    ('multihop', 'Multihop', r'\d+', _to_int, 0),
+    ('multipath', 'Local AddPath[^:\n]*?', r'\S+', _is_enabled, True),
+    ('remove_private_as', 'Remove Private', r'\S+', _is_enabled, True),
+    ('input_messages', 'i/p Messages', r'\d+', _to_int, 0),
+    ('output_messages', 'o/p Messages', r'\d+', _to_int, 0),
+    ('input_updates', 'i/p Updates', r'\d+', _to_int, 0),
+    ('output_updates', 'o/p Updates', r'\d+', _to_int, 0),
+    ('messages_queued_out', 'Output Queue', r'\d+', _to_int, 0),
+    ('holdtime', 'Hold Time', r'\w+', _to_int, 0),
+    ('keepalive', 'Keep Alive', r'\w+', _to_int, 0),
+    ('active_prefix_count', 'IPv4 Active Prefixes', r'\w+', _to_int, 0),
+    ('active_pfx_vpn_ipv4_count', 'VPN-IPv4 Active Pfxs', r'\w+', _to_int, 0),
+    ('receive_prefix_count', r'IPv4 Recd\. Prefixes', r'\w+', _to_int, 0),
+    ('receive_pfx_vpn_ipv4_count', r'VPN-IPv4 Recd\. Pfxs', r'\w+', _to_int, 0),
+    ('suppressed_prefix_count', 'IPv4 Suppressed Pfxs', r'\w+', _to_int, 0),
+    ('suppressed_pfx_count_vpn_ipv4', r'VPN-IPv4 Suppr\. Pfxs', r'\w+', _to_int, 0),
+    ('flap_count', 'Num of Update Flaps', r'\w+', _to_int, 0),
+)
+
+
+FACTS_FIELDS = _field_table(
+    ('hostname', 'System Name', '.*', str, ''),
+    ('model', 'System Type', '.*', str, ''),
+    ('os_version', 'System Version', '.*', str, ''),
+    ('uptime', 'System Up Time', r'[^(\n]*', str, ''),
+    ('serial_number', 'Serial number', '.*', str, ''),
+)
+
+# `show router interface`: header line giving the column offsets, address lines, "Up/Down" states.
+INTERFACE_HEADER_RE = re.compile(r'^Interface-Name\s')
+INTERFACE_ADDRESS_RE = re.compile(r'^\s+(\d+.\d+.\d+.\d+/\d+)')
+OPER_STATUS_RE = re.compile(r'(\w+)(?:/(\w+))?')
+
+# `admin rollback view` checkpoint line and the date line below it; `admin rollback compare` diff line.
+ROLLBACK_ENTRY_RE = re.compile(r'^(latest|rescue|\d+)\s+(\.\S+)[ \t]*(.*)$')
+ROLLBACK_DATE_RE = re.compile(r'^\s+(\d{4}/\d\d/\d\d\s+\d\d:\d\d:\d\d(?:\s+[A-Z]+)?)\s*$')
+DIFF_LINE_RE = re.compile(r'^([-+ ])(\s*)(\S.*?)\s*$')
+
+# Interface table reduced to the lines holding an interface name.
+INTERFACE_NAMES_CMD = '/show router interface exclude-services | match "^[^ ]" expression\n'
+
+
+class PromptScanner(object):
+    """Follow shell output chunk by chunk until the expected prompts have come back.
+
+    Every line sent to the shell is answered by one prompt, so the exchange is
+    complete once `prompts` prompts were seen and the output ends with one.
+    If `until` is given, a line matching it must have been seen as well.
+    With `keep=False` the output is not kept; `lines` holds the lines
+    completed by the last chunk fed.
+    """
+
+    def __init__(self, prompts=1, until=None, keep=True):
+        self.prompts = prompts
+        self.until = until
+        self.keep = keep
+        self.chunks = []
+        self.lines = []
+        self.pending = ''
+        self.seen = 0
+        self.found = until is None
+
+    def feed(self, data):
+        """Add one decoded chunk and return True once the device is back at its prompt."""
+        if self.keep:
+            self.chunks.append(data)
+        lines = (self.pending + data).split('\n')
+        self.pending = lines.pop()
+        self.lines = lines
+        for line in lines:
+            if PROMPT_RE.match(line):
+                self.seen += 1
+            if not self.found and self.until.search(line):
+                self.found = True
+        return bool(self.found and self.seen + 1 >= self.prompts and PROMPT_END_RE.match(self.pending))
+
+    def output(self):
+        return ''.join(self.chunks)
+
+
+class ExecReport(object):
+    """Fold `exec -echo` output lines into the result of the run.
+
+    Each echoed prompt line is the next line of the file, so errors are
+    reported with the file line that caused them.
+    """
+
+    def __init__(self, progress=None):
+        self.progress = progress
+        self.line = 0
+        self.lines = []
+        self.errors = []
+        self.executed = None
+        self.success = False
+
+    def feed(self, text):
+        text = text.rstrip('\r')
+        self.lines.append(text)
+        if PROMPT_RE.match(text):
+            self.line += 1
+        executed = EXEC_EXECUTED_RE.match(text)
+        failed = EXEC_FAILED_LINE_RE.match(text)
+        if executed:
+            self.executed = int(executed.group(1))
+            self.success = not self.errors
+        elif failed:
+            self.executed = int(failed.group(1))
+            if not self.errors:
+                self.errors.append({'line': self.executed, 'error': text.strip()})
+        elif EXEC_ERROR_RE.match(text):
+            self.errors.append({'line': self.line, 'error': text.strip()})
+        if self.progress is not None:
+            self.progress(self.line, text)
+
+    def result(self):
+        return {'success': self.success,
+                'executed_lines': self.line if self.executed is None else self.executed,
+                'errors': self.errors,
+                'output': '\n'.join(self.lines)}
+
+
+class InterfaceTable(object):
+    """Fold `show router interface` lines into Interface records, cut at the column offsets of the header line.
+
+    Rows lie between the first two dash rules. An interface line holding
+    only the name takes its other columns from the next line; the first
+    address line below an interface gives its `ip`. `feed()` returns a
+    record once the next interface or the closing rule is read, `close()`
+    the one still pending.
+    """
+
+    def __init__(self):
+        self.offsets = None
+        self.rules = 0
+        self.columns = None
+        self.ip = None
+
+    def feed(self, line):
+        line = line.rstrip('\r')
+        if '----' in line:
+            self.rules += 1
+            return self.close()
+        if self.rules == 0:
+            if self.offsets is None and INTERFACE_HEADER_RE.match(line):
+                self.offsets = _column_offsets(line)
+        elif self.rules != 1 or not line.strip():
+            pass
+        elif not line[0].isspace():
+            finished = self.close()
+            self.columns = self.cut(line)
+            return finished
+        elif self.columns is None:
+            pass
+        elif len(self.columns) == 1 and not INTERFACE_ADDRESS_RE.match(line):
+            self.columns += self.cut(line)[1:]
+        elif self.ip is None:
+            address = INTERFACE_ADDRESS_RE.match(line)
+            self.ip = address.group(1) if address else None
+        return None
+
+    def close(self):
+        if self.columns is None:
+            return None
+        columns, ip = self.columns, self.ip
+        self.columns, self.ip = None, None
+        name, admin_status, oper_status, mode, link_to = (columns + [''] * 5)[:5]
+        status = OPER_STATUS_RE.match(oper_status)
+        ipv4_status, ipv6_status = status.groups() if status else (None, None)
+        return Interface(name, admin_status or False, ipv4_status or False, ipv6_status or False,
+                         mode or False, ip or False, link_to or False)
+
+    def cut(self, line):
+        """Cut an interface line at the header offsets; whitespace-split when there is no header
+        or the name runs into the next column."""
+        offsets = self.offsets
+        if offsets is None or (len(line) >= offsets[1] and not line[offsets[1] - 1].isspace()):
+            return line.split(None, 4)
+        if not line[offsets[1]:].strip():
+            return [line.strip()]
+        return [line[start:end].strip() for start, end in zip(offsets, offsets[1:] + [None])]
+
+
+class RollbackIndex(object):
+    """Fold `admin rollback view` lines into RollbackEntry records.
+
+    `feed()` returns a record once its date line (or the next checkpoint)
+    is read, `close()` the one still pending.
+    """
+
+    def __init__(self):
+        self.entry = None
+
+    def feed(self, text):
+        text = text.rstrip('\r')
+        if not text.strip():
+            return None
+        date = ROLLBACK_DATE_RE.match(text)
+        if date and self.entry is not None:
+            entry, self.entry = self.entry, None
+            return entry._replace(timestamp=' '.join(date.group(1).split()))
+        entry = ROLLBACK_ENTRY_RE.match(text)
+        if entry is None:
+            return None
+        finished = self.close()
+        self.entry = RollbackEntry(entry.group(1), entry.group(2), '', entry.group(3).strip())
+        return finished
+
+    def close(self):
+        entry, self.entry = self.entry, None
+        return entry
+
+
+class ConfigDiff(object):
+    """Fold `admin rollback compare` lines into ConfigHunk records.
+
+    Lines are a `+`, `-` or blank marker followed by the indented
+    configuration. Unchanged lines are the contexts giving each hunk its
+    path; a hunk is returned by `feed()` when an unchanged line or another
+    path follows it, the last one by `close()`.
+    """
+
+    def __init__(self):
+        self.contexts = []
+        self.hunk = None
+
+    def feed(self, text):
+        line = DIFF_LINE_RE.match(text.rstrip('\r'))
+        if line is None:
+            return None
+        marker, indent, text = line.groups()
+        if text == 'exit' or not text.strip('-='):
+            return None
+        while self.contexts and self.contexts[-1][0] >= len(indent):
+            self.contexts.pop()
+        path = tuple(context for _, context in self.contexts)
+        self.contexts.append((len(indent), text))
+        finished = None
+        if marker == ' ' or (self.hunk is not None and self.hunk[0] != path):
+            finished = self.close()
+        if marker != ' ':
+            if self.hunk is None:
+                self.hunk = (path, [], [])
+            self.hunk[1 if marker == '-' else 2].append(text)
+        return finished
+
+    def close(self):
+        if self.hunk is None:
+            return None
+        path, removed, added = self.hunk
+        self.hunk = None
+        return ConfigHunk(path, tuple(removed), tuple(added))
+
+
+class CommandCache(object):
+    """LRU cache with a TTL for command outputs and parsed getter results.
+
+    Enabled per driver with optional_args['cache_ttl'] (seconds) and
+    optional_args['cache_size'] (entries). `hits` and `misses` count lookups.
+    """
+
+    def __init__(self, ttl, max_size=256):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None or entry[0] <= time.time():
+            self.misses += 1
+            return None
+        self._entries[key] = entry
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value):
+        self._entries.pop(key, None)
+        self._entries[key] = (time.time() + self.ttl, value)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+def cached_result(getter):
+    """Serve a getter from the driver cache, keyed by getter name and arguments.
+
+    The cache holds its own copy of the result and every hit returns a fresh
+    copy, so callers changing a result do not change later ones.
+    """
+    @functools.wraps(getter)
+    def wrapper(self, *args, **kwargs):
+        if self.cache is None:
+            return getter(self, *args, **kwargs)
+        key = (getter.__name__, args, tuple(sorted(kwargs.items())))
+        result = self.cache.get(key)
+        if result is not None:
+            return copy.deepcopy(result)
+        result = getter(self, *args, **kwargs)
+        if result is not None:
+            self.cache.set(key, copy.deepcopy(result))
+        return result
+    return wrapper
+
+
+def snapshot(getter):
+    """Append the getter result (as NAPALM dicts) to the driver's snapshot store, if one is set."""
+    @functools.wraps(getter)
+    def wrapper(self, *args, **kwargs):
+        result = getter(self, *args, **kwargs)
+        self._store_snapshot(getter.__name__, args, kwargs, result)
+        return result
+    return wrapper
+
+
+def instrumented(getter):
+    """Tag events emitted while `getter` runs with its name and emit its total duration.
+
+    Nested getters (get_facts calling get_interfaces) keep the outer name.
+    """
+    @functools.wraps(getter)
+    def wrapper(self, *args, **kwargs):
+        if not self.instrumentation or self._getter is not None:
+            return getter(self, *args, **kwargs)
+        self._getter = getter.__name__
+        start = time.time()
+        try:
+            return getter(self, *args, **kwargs)
+        finally:
+            self._getter = None
+            self._emit('getter', getter=getter.__name__, duration=time.time() - start)
+    return wrapper
+
+
+def timed_parse(parser):
+    """Emit a 'parse' event with the CPU (`duration`) and wall-clock (`wall`) time of a `_parse_*` helper."""
+    @functools.wraps(parser)
+    def wrapper(self, *args, **kwargs):
+        if not self.instrumentation:
+            return parser(self, *args, **kwargs)
+        start, cpu_start = time.time(), cpu_time()
+        try:
+            return parser(self, *args, **kwargs)
+        finally:
+            self._emit('parse', parser=parser.__name__, duration=cpu_time() - cpu_start, wall=time.time() - start)
+    return wrapper
+
+
+class SSHConnectionPool(object):
+    """Authenticated paramiko clients kept alive between SROSDriver sessions.
+
+    Clients are keyed by (hostname, port, username). A driver given the pool
+    through optional_args['connection_pool'] takes a live client on open()
+    and hands it back on close(), so repeated sessions skip the TCP connect,
+    key exchange and authentication.
+    """
+
+    def __init__(self, max_idle=1):
+        self.max_idle = max_idle
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        """Return a live client for `key`, or None if there is none to reuse."""
+        with self._lock:
+            clients = self._idle.get(key, [])
+            while clients:
+                client = clients.pop()
+                transport = client.get_transport()
+                if transport is not None and transport.is_active():
+                    return client
+                client.close()
+        return None
+
+    def release(self, key, client):
+        with self._lock:
+            clients = self._idle.setdefault(key, [])
+            if len(clients) < self.max_idle:
+                clients.append(client)
+                return
+        client.close()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for clients in idle.values():
+            for client in clients:
+                client.close()
+
+
 class SROSDriver(object):
 
     def __init__(self, hostname, username, password, timeout=60, optional_args=None):
@@ -18,10 +539,53 @@ class SROSDriver(object):
         self.password = password
         self.timeout = timeout
         self.port = optional_args.get('port', 22)
+        self.idle_timeout = optional_args.get('idle_timeout', 10)
+        self.read_size = optional_args.get('read_size', 65535)
+        self.batch_size = optional_args.get('batch_size', 20)
+        self.exec_rate = optional_args.get('exec_rate', 500)
+        self.result_format = optional_args.get('result_format', 'dict')
+        if self.result_format not in RESULT_FORMATS:
+            raise ValueError('result_format must be one of {}'.format(', '.join(RESULT_FORMATS)))
+        self.pool = optional_args.get('connection_pool')
+        self.delta_store = optional_args.get('delta_store', {})
+        self.config_index = optional_args.get('config_index', False)
+        self.snapshot_store = optional_args.get('snapshot_store')
+        self._config_index = None
+        cache_ttl = optional_args.get('cache_ttl')
+        self.cache = CommandCache(cache_ttl, optional_args.get('cache_size', 256)) if cache_ttl else None
+        instrumentation = optional_args.get('instrumentation') or []
+        self.instrumentation = instrumentation if isinstance(instrumentation, list) else [instrumentation]
+        self._getter = None
         self.ssh = paramiko.SSHClient()
         self.device = None
 
     def open(self):
+        self._connect()
+        self.device = self.ssh.invoke_shell()
+        self._read_until_prompt()
+        self.command('/environment no more')
+
+    def close(self):
+        if self.device is not None:
+            self.device.close()
+            self.device = None
+        if self.pool is not None and self._is_connected():
+            self.pool.release(self._pool_key(), self.ssh)
+            self.ssh = paramiko.SSHClient()
+        else:
+            self.ssh.close()
+
+    def _connect(self):
+        """Make sure self.ssh holds an authenticated transport, reusing a live one when possible."""
+        if self._is_connected():
+            return
+        start = time.time()
+        if self.pool is not None:
+            client = self.pool.acquire(self._pool_key())
+            if client is not None:
+                self.ssh = client
+                self._emit('connect', duration=time.time() - start, reused=True)
+                return
         self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         self.ssh.connect(
                             hostname=self.hostname,
@@ -29,112 +593,354 @@ class SROSDriver(object):
                             username=self.username,
                             password=self.password
                             )
-        self.device = self.ssh.invoke_shell()
+        self._emit('connect', duration=time.time() - start, reused=False)
 
-    def close(self):
-        self.ssh.close()
+    def _emit(self, event, **fields):
+        """Pass an instrumentation event to every listener in optional_args['instrumentation'].
+
+        Every event carries `event`, `hostname`, `getter` (None outside a
+        getter) and `time`; see SROSInstrumentation for the event fields.
+        """
+        if not self.instrumentation:
+            return
+        record = {'event': event, 'hostname': self.hostname, 'getter': self._getter, 'time': time.time()}
+        record.update(fields)
+        for listener in self.instrumentation:
+            listener(record)
+
+    def _store_snapshot(self, getter, args, kwargs, result):
+        """Append `result` to the snapshot store; a store error is emitted as an event, never raised."""
+        if self.snapshot_store is None or result is None:
+            return
+        key = snapshot_key(getter, args, kwargs)
+        try:
+            self.snapshot_store.append(self.hostname, key, to_napalm(result))
+        except Exception as exc:
+            self._emit('snapshot_error', snapshot=key, error='{}: {}'.format(type(exc).__name__, exc))
+
+    def _is_connected(self):
+        transport = self.ssh.get_transport()
+        return transport is not None and transport.is_active()
+
+    def _pool_key(self):
+        return (self.hostname, self.port, self.username)
 
     def command(self, cmd):
-        self.device.send('/environment no more\n')
-        self.device.send('{}\n'.format(cmd))
-        time.sleep(1)
-        return self.device.recv(65535)
+        cmd = self._with_newline(cmd)
+        output = self._cached_command(cmd)
+        if output is None:
+            output = self._exchange(cmd)
+            self._store_command(cmd, output)
+        return output
+
+    def command_batch(self, cmds):
+        """Run several commands with one write per batch and return one output per command.
+
+        Up to `batch_size` commands are written to the shell together and read
+        back in one exchange. The combined output is cut at the prompt that
+        precedes each echoed command line.
+        """
+        return self._command_batch(cmds)
+
+    def _command_batch(self, cmds, invalidate=True):
+        """command_batch(); `invalidate=False` is for the driver's own read-only `/configure ... info` lookups,
+        which must not clear the cache and config index like a configuration change."""
+        cmds = [self._with_newline(cmd) for cmd in cmds]
+        outputs = [self._cached_command(cmd) for cmd in cmds]
+        missing = [i for i, output in enumerate(outputs) if output is None]
+        for batch in self._batches(missing):
+            text = ''.join(cmds[i] for i in batch)
+            output = self._exchange(text, invalidate=invalidate)
+            for i, block in zip(batch, self._split_batch_output([cmds[i] for i in batch], output)):
+                outputs[i] = block
+                self._store_command(cmds[i], block)
+        return outputs
+
+    def _exchange(self, text, invalidate=True):
+        """Send `text` in one write, read until its prompts come back and emit a 'command' event."""
+        if invalidate:
+            self._invalidate_on_config(text)
+        start = time.time()
+        self.device.send(text)
+        output = self._read_until_prompt(prompts=text.count('\n'))
+        self._emit_command(text, len(output), time.time() - start)
+        return output
 
+    def _stream_lines(self, text, until=None, timeout=None, idle_timeout=None):
+        """Send `text` and yield output lines as they arrive, without keeping the whole output.
+
+        If the caller stops early, the rest of the output is read and dropped
+        so the session stays in step with the prompt.
+        """
+        self._invalidate_on_config(text)
+        start = time.time()
+        self.device.send(text)
+        scanner = PromptScanner(text.count('\n'), until=until, keep=False)
+        chunks = self._recv_chunks(timeout, idle_timeout)
+        size = 0
+        done = False
+        try:
+            for data in chunks:
+                size += len(data)
+                done = scanner.feed(data)
+                for line in scanner.lines:
+                    yield line
+                if done:
+                    break
+        finally:
+            if not done:
+                for data in chunks:
+                    size += len(data)
+                    if scanner.feed(data):
+                        break
+            self._emit_command(text, size, time.time() - start)
+
+    def _emit_command(self, text, size, duration):
+        self._emit('command', command=text.strip(), lines=text.count('\n'),
+                   bytes=size, duration=duration)
+
+    def _batches(self, items):
+        for start in range(0, len(items), self.batch_size):
+            yield items[start:start + self.batch_size]
+
+    def _with_newline(self, cmd):
+        return cmd if cmd.endswith('\n') else cmd + '\n'
+
+    def _is_cacheable(self, cmd):
+        return self.cache is not None and all(SHOW_RE.match(line) for line in cmd.splitlines())
+
+    def _cached_command(self, cmd):
+        if self._is_cacheable(cmd):
+            return self.cache.get(('command', cmd))
+        return None
+
+    def _store_command(self, cmd, output):
+        if self._is_cacheable(cmd):
+            self.cache.set(('command', cmd), output)
+
+    def _invalidate_on_config(self, cmd):
+        if CONFIG_CHANGE_RE.search(cmd):
+            self._config_index = None
+            if self.cache is not None:
+                self.cache.clear()
+
+    def _split_batch_output(self, batch, output):
+        blocks = self._split_prompt_blocks(output, sum(cmd.count('\n') for cmd in batch))
+        outputs = []
+        for cmd in batch:
+            lines = cmd.count('\n')
+            outputs.append(''.join(blocks[:lines]))
+            blocks = blocks[lines:]
+        return outputs
+
+    def _split_prompt_blocks(self, output, count):
+        """Split shell output into the `count` blocks answering the last `count` lines sent."""
+        blocks = []
+        start = 0
+        for prompt in PROMPT_LINE_RE.finditer(output):
+            blocks.append(output[start:prompt.start()])
+            start = prompt.end()
+        return blocks[-count:]
+
+    def _read_until_prompt(self, prompts=1):
+        """Read the shell channel until the device is back at its prompt.
+
+        See PromptScanner for when an exchange is complete.
+        """
+        scanner = PromptScanner(prompts)
+        for data in self._recv_chunks():
+            if scanner.feed(data):
+                return scanner.output()
+
+    def _recv_chunks(self, timeout=None, idle_timeout=None):
+        """Yield decoded chunks from the shell channel as they arrive.
+
+        `idle_timeout` bounds the silence between two chunks and `timeout`
+        the whole exchange (the driver settings by default); both raise
+        CommandTimeoutException instead of letting the caller work on
+        truncated output.
+        """
+        timeout = timeout or self.timeout
+        idle_timeout = idle_timeout or self.idle_timeout
+        deadline = time.time() + timeout
+        decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise CommandTimeoutException(
+                    '{}: no prompt after {}s'.format(self.hostname, timeout))
+            self.device.settimeout(min(idle_timeout, remaining))
+            try:
+                data = self.device.recv(self.read_size)
+            except socket.timeout:
+                raise CommandTimeoutException(
+                    '{}: no output for {}s while waiting for prompt'.format(self.hostname, idle_timeout))
+            if not data:
+                raise ConnectionClosedException('{}: channel closed'.format(self.hostname))
+            if not isinstance(data, str):
+                data = decoder.decode(data)
+            yield data
+
+    @instrumented
     def scp_file_put(self, source_file, dest_file):
-        self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        self.ssh.connect(
-                            hostname=self.hostname,
-                            port=self.port,
-                            username=self.username,
-                            password=self.password
-                            )
+        self._connect()
         scp = SCPClient(self.ssh.get_transport())
         scp.put(source_file, dest_file)
 
+    @instrumented
     def scp_file_get(self, dest_file):
+        self._connect()
         scp = SCPClient(self.ssh.get_transport())
         scp.get(dest_file)
 
+    def open_sftp(self):
+        self._connect()
+        return self.ssh.open_sftp()
+
+    @instrumented
+    def put_file(self, source_file, dest_file, md5=None):
+        """Copy `source_file` to `dest_file` unless the same file is already there.
+
+        One `file dir` gives the remote size and the free space; the remote
+        MD5 is only computed when the sizes match. Returns `status` ('skipped',
+        'copied' or 'no_space'), `bytes` sent, `duration` and `throughput`
+        in bytes per second.
+        """
+        start = time.time()
+        size = os.stat(source_file).st_size
+        output = self.command('file dir {}'.format(dest_file))
+        remote_size = None
+        if 'CLI File Not Found' not in output:
+            remote_size = self._dir_size(output)
+        else:
+            output = self.command('file dir')
+        sent = 0
+        if remote_size == size and self._remote_md5(dest_file) == (md5 or file_md5(source_file)):
+            status = 'skipped'
+        elif self._free_bytes(output) + (remote_size or 0) < size:
+            status = 'no_space'
+        else:
+            self.scp_file_put(source_file, dest_file)
+            status = 'copied'
+            sent = size
+        duration = time.time() - start
+        return {'status': status, 'bytes': sent, 'duration': duration,
+                'throughput': sent / duration if sent else 0.0}
+
+    def _remote_md5(self, dest_file):
+        """MD5 of a file on the device: the SFTP check-file extension if supported, else read and hashed here."""
+        sftp = self.open_sftp()
+        try:
+            remote = sftp.open(dest_file, 'rb')
+            try:
+                return binascii.hexlify(remote.check('md5')).decode('ascii')
+            except IOError:
+                remote.prefetch()
+                return file_md5(remote)
+            finally:
+                remote.close()
+        finally:
+            sftp.close()
+
+    @instrumented
+    @snapshot
+    @cached_result
     def get_interfaces(self):
-        self.device.send('\n/environment no more\n')
-        time.sleep(1)
-        self.device.send('/show router interface exclude-services\n')
-        time.sleep(1)
-        output = self.device.recv(65535)
-        ifaces_split = re.split('----+', output)
-        all_ifaces = re.findall(r'^(\w.*[\r\n]+.*)', ifaces_split[1], re.MULTILINE)
-        interface_facts = {}
-        for iface in all_ifaces:
-            iface_name = self._search_func(r'^(.{1,32})', iface)
-            admin_status = self._search_func(r'.{33}(\w+)', iface)
-            ipv4_status = self._search_func(r'.{43}(\w+)', iface)
-            ipv6_status = self._search_func(r'.{43}\w+/(\w+)', iface)
-            mode = self._search_func(r'.{55}(\w+)', iface)
-            link_to = self._search_func(r'.{63}(.+)[\r\n]+', iface)
-            ip = self._search_func(r'\s+(\d+.\d+.\d+.\d+/\d+)', iface)
-            interface_facts.update({iface_name.rstrip(): {
-                                'admin_status': admin_status,
-                                'ipv4_status': ipv4_status,
-                                'ipv6_status': ipv6_status,
-                                'mode': mode,
-                                'ip': ip,
-                                'link_to': link_to.rstrip()
-                                }})
-        return interface_facts
+        output = self.command('/show router interface exclude-services')
+        return shape(Interface, self._parse_interfaces(output), self.result_format)
+
+    def iter_interfaces(self):
+        """Yield (name, facts) pairs of get_interfaces() as the table is received (Interface records
+        unless `result_format` is 'dict')."""
+        for row in self._interface_rows(self._stream_lines('/show router interface exclude-services\n')):
+            if self.result_format == 'dict':
+                yield row.name, dict(zip(row._fields[1:], row[1:]))
+            else:
+                yield row
+
+    @timed_parse
+    def _parse_interfaces(self, output):
+        return list(self._interface_rows(output.split('\n')))
 
+    def _interface_rows(self, lines):
+        table = InterfaceTable()
+        for line in lines:
+            row = table.feed(line)
+            if row is not None:
+                yield row
+        row = table.close()
+        if row is not None:
+            yield row
+
+    @instrumented
+    @snapshot
     def get_facts(self):
-        sys_info = '/show system information'
-        sys_name = '{} | match "System Name"\n'.format(sys_info)
-        sys_type = '{} | match "System Type"\n'.format(sys_info)
-        serial = '/show chassis\n/show chassis detail\n'
-        sys_version = '{} | match "System Version"\n'.format(sys_info)
-        sys_uptime = '{} | match "System Up Time"\n'.format(sys_info)
-        self.device.send(sys_name + sys_type + serial + sys_version + sys_uptime)
-        time.sleep(1)
-        output = self.device.recv(65535)
-        hostname = self._search_func(r'System Name +: (.*)', output)
-        model = self._search_func(r'System Type +: (.*)', output)
-        serial_number = self._search_func(r'Serial number +: (.*)', output)
-        os_version = self._search_func(r'System Version +: (.*)', output)
-        uptime = self._search_func(r'System Up Time +: (.*) \(', output)
-        return {
-            'vendor': 'Nokia',
-            'model': model.rstrip(),
-            'serial_number': serial_number.rstrip(),
-            'os_version': os_version.rstrip(),
-            'hostname': hostname.rstrip(),
-            'fqdn': hostname.rstrip(),
-            'uptime': uptime,
-            'interface': self.get_interfaces().keys()
-            }
+        system, names = self.command_batch(['/show system information\n/show chassis detail\n',
+                                            INTERFACE_NAMES_CMD])
+        facts = self._parse_facts(system)
+        facts['interface'] = self._parse_interface_names(names)
+        return facts
+
+    @timed_parse
+    def _parse_facts(self, output):
+        facts = self._extract_fields(FACTS_FIELDS, output)
+        facts.update(vendor='Nokia', fqdn=facts['hostname'])
+        return facts
 
+    @timed_parse
+    def _parse_interface_names(self, output):
+        """Names of the interface lines, cut like the full table so long names are kept whole."""
+        return [row.name for row in self._interface_rows(output.split('\n'))]
+
+    @instrumented
+    @snapshot
+    @cached_result
     def get_arp_table(self):
-        self.device.send("/show router arp\n")
-        time.sleep(1)
-        output = self.device.recv(65535)
-        arp_output = output.splitlines()
-        arp_table = []
-        for arp_entry in arp_output:
-            arp_search = re.search('^(\d+.\d+.\d+.\d+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(.*)', arp_entry)
-            try:
-                ip = arp_search.group(1)
-                mac = arp_search.group(2)
-                age = 0
-                iface = arp_search.group(5)
-            except Exception as f:
-                pass
-            else:
-                arp_table.append({'mac': mac,
-                                  'ip': ip,
-                                  'interface': iface,
-                                  'age': age})
-        return arp_table
+        return shape(ArpEntry, self._iter_arp_records(), self.result_format)
 
+    def iter_arp_table(self):
+        """Yield get_arp_table() entries as the table is received, keeping only the current line."""
+        for entry in self._iter_arp_records():
+            yield dict(zip(entry._fields, entry)) if self.result_format == 'dict' else entry
+
+    def _iter_arp_records(self):
+        """ArpEntry records as the table streams in; the time spent parsing lines is emitted as one
+        '_parse_arp_table' parse event when the stream ends."""
+        timing = bool(self.instrumentation)
+        cpu = wall = 0.0
+        try:
+            for arp_entry in self._stream_lines('/show router arp\n'):
+                if timing:
+                    start, cpu_start = time.time(), cpu_time()
+                entry = self._parse_arp_entry(arp_entry.rstrip('\r'))
+                if timing:
+                    cpu += cpu_time() - cpu_start
+                    wall += time.time() - start
+                if entry is not None:
+                    yield entry
+        finally:
+            self._emit('parse', parser='_parse_arp_table', duration=cpu, wall=wall)
+
+    def _parse_arp_entry(self, arp_entry):
+        arp_search = ARP_ENTRY_RE.match(arp_entry)
+        if arp_search is None:
+            return None
+        return ArpEntry(arp_search.group(2), arp_search.group(1), arp_search.group(5), 0)
+
+    @instrumented
+    @snapshot
+    @cached_result
     def get_bgp_config(self, group='', neighbor='', vrf=''):
-        bgp_response = self.command('/show router {} bgp neighbor\n'.format(vrf))
-        neigh_list_section = self._get_bgp_neighbors_section(bgp_response)
-        bgp_n_parms = self._get_bgp_neighbors_parms(neigh_list_section)
+        if vrf == 'all':
+            return self._get_bgp_config_all(group, neighbor)
+        if self.config_index:
+            return self._select_bgp_config(bgp_config(self.get_config_index(), vrf), group, neighbor)
+        bgp_n_parms = self._get_bgp_neighbors_config(vrf)
         bgp_gr_response = self.command('/show router {} bgp group\n'.format(vrf))
+        return self._join_bgp_config(bgp_n_parms, bgp_gr_response, group, neighbor)
+
+    @timed_parse
+    def _join_bgp_config(self, bgp_n_parms, bgp_gr_response, group='', neighbor=''):
         gr_list_section = self._get_bgp_group_section(bgp_gr_response)
         bgp_gr_parms = self._get_bgp_group_parms(gr_list_section)
         for bgp_gr in bgp_gr_parms.keys():
@@ -148,125 +954,82 @@ class SROSDriver(object):
             return bgp_n_parms[neighbor]
         return bgp_gr_parms
 
+    def _get_bgp_config_all(self, group='', neighbor=''):
+        vrfs = self._vrf_list()
+        if self.config_index:
+            index = self.get_config_index()
+            return dict((vrf or 'global', self._select_bgp_config(bgp_config(index, vrf), group, neighbor))
+                        for vrf in vrfs)
+        outputs = self.command_batch(self._bgp_config_all_commands(vrfs))
+        return self._join_bgp_config_all(vrfs, outputs, group, neighbor)
+
+    def _bgp_config_all_commands(self, vrfs):
+        return [cmd for vrf in vrfs for cmd in ('/show router {} bgp neighbor\n'.format(vrf),
+                                                '/show router {} bgp group\n'.format(vrf))]
+
+    def _join_bgp_config_all(self, vrfs, outputs, group='', neighbor=''):
+        return dict((vrf or 'global', self._join_bgp_config(self._parse_bgp_neighbors_config(bgp_response),
+                                                            bgp_gr_response, group, neighbor))
+                    for vrf, bgp_response, bgp_gr_response in zip(vrfs, outputs[::2], outputs[1::2]))
+
+    def _select_bgp_config(self, bgp_gr_parms, group='', neighbor=''):
+        """get_bgp_config() selection on groups already holding their neighbors."""
+        if group and group in bgp_gr_parms:
+            return bgp_gr_parms[group]
+        for parms in bgp_gr_parms.values():
+            if neighbor and neighbor in parms['neighbors']:
+                return parms['neighbors'][neighbor]
+        return bgp_gr_parms
+
+    @cached_result
+    def _get_bgp_neighbors_config(self, vrf=''):
+        bgp_response = self.command('/show router {} bgp neighbor\n'.format(vrf))
+        return self._parse_bgp_neighbors_config(bgp_response)
+
+    @timed_parse
+    def _parse_bgp_neighbors_config(self, bgp_response):
+        neigh_list_section = self._get_bgp_neighbors_section(bgp_response)
+        return self._get_bgp_neighbors_parms(neigh_list_section)
 
     def _get_bgp_neighbors_parms(self, neighbors_list):
         bgp_neighbors_parms = {}
         for neighbor in neighbors_list:
-            bgp_group = self._search_func('Group\s+:\s(.*)',neighbor, '')
-            r_neighbor = self._search_func('Peer\s+:\s(\d+.\d+.\d+.\d+)',
-                                                neighbor, '')
-            desc = self._search_func('Description\s+:\s(.*)', neighbor, '')
-            im_pol = self._search_func('Import Policy\s+:\s(.*)', neighbor, '')
-            ex_pol = self._search_func('Export Policy\s+:\s(.*)', neighbor, '')
-            loc_add = self._search_func('Local Address\s+:\s(\d+.\d+.\d+.\d+)',
-                                                neighbor, '')
-            loc_as = self._search_func('Local AS\s+:\s(\S+)', neighbor, 0)
-            peer_as = self._search_func('Peer AS\s+:\s(\S+)', neighbor, 0)
-            auth = self._search_func('Auth key chain\s+:\s(\S+)', neighbor, '')
-            prefix_l = self._search_func('Prefix Limit\s+:\s(\S+)', neighbor, {})
-            rr_client = self._search_func('Cluster Id\s+:\s(\d+.\d+.\d+.\d+)',
-                                                neighbor, False)
-            if rr_client:
-                rr_client = True
-            nhs = self._search_func('Next Hop Self\s+:\s(Enabled)', neighbor, False)
-            if nhs:
-                nhs = True
-            bgp_neighbors_parms[r_neighbor] = {
-                'bgp_group': bgp_group,
-                'description': desc,
-                'import_policy': im_pol,
-                'export_policy': ex_pol,
-                'local_address': loc_add,
-                'local_as': loc_as,
-                'remote_as': peer_as,
-                'authentication_key': auth,
-                'prefix_limit': prefix_l,
-                'route_reflector_client': rr_client,
-                'nhs': nhs}
+            parms = self._extract_fields(BGP_NEIGHBOR_FIELDS, neighbor)
+            bgp_neighbors_parms[parms.pop('peer')] = parms
         return bgp_neighbors_parms
 
     def _get_bgp_neighbors_section(self, bgp_response):
-        neighbors = re.findall('^Peer\s+:\s(\d+.\d+.\d+.\d+)',
-                               bgp_response, re.MULTILINE)
-        neighbors_list_section = []
-        neighbors_len = len(neighbors)
-        for neighbor in neighbors:
-            n_index = neighbors.index(neighbor)
-            n_search = re.search(r'(Peer[ ]{{1,17}}: {})'.format(neighbor),
-                                 bgp_response).group(1)
-            neighbor_start = bgp_response.index(n_search)
-            section = bgp_response[neighbor_start:]
-            if (n_index + 1) == neighbors_len:
-                neighbor_sect = section
-            else:
-                neighbor_end = section.index(': {}'.format(neighbors[n_index + 1]))
-                neighbor_sect = section[:neighbor_end]
-            neighbors_list_section.append(neighbor_sect)
-        return neighbors_list_section
+        return self._split_sections(BGP_NEIGHBOR_START_RE, bgp_response)
 
     def _get_bgp_group_parms(self, bgp_groups_list):
         bgp_groups_parms = {}
         for bgp_group in bgp_groups_list:
-            r_group = self._search_func('Group\s+:\s(.*)',
-                                        bgp_group, '').rstrip()
-            gr_type = self._search_func('Group Type\s+:\s(\w+)',
-                                        bgp_group, '')
-            desc = self._search_func('Description\s+:\s(.*)', bgp_group, '')
-            multihop = self._search_func('Multihop\s+:\s(\d+)', bgp_group, 0)
-            multipath = self._search_func('Multipath\s+:\s(\d+)', bgp_group, False)
-            im_pol = self._search_func('Import Policy\s+:\s(.*)', bgp_group, '')
-            ex_pol = self._search_func('Export Policy\s+:\s(.*)', bgp_group, '')
-            loc_add = self._search_func('Local Address\s+:\s(\d+.\d+.\d+.\d+)',
-                                        bgp_group, '')
-            loc_as = self._search_func('Local AS\s+:\s(\S+)', bgp_group, 0)
-            peer_as = self._search_func('Peer AS\s+:\s(\S+)', bgp_group, 0)
-            remove_private_as = self._search_func('Remove Private\s+:\s(\S+)',
-                                                  bgp_group, False)
-            if remove_private_as:
-                remove_private_as = True
-            prefix_l = self._search_func('Prefix Limit\s+:\s(\S+)',
-                                         bgp_group, {})
-            bgp_groups_parms[r_group] = {
-                'description': desc,
-                'type': gr_type,
-                'multihop_ttl': multihop,
-                'multipath': multipath,
-                'import_policy': im_pol,
-                'export_policy': ex_pol,
-                'local_address': loc_add,
-                'local_as': loc_as,
-                'remote_as': peer_as,
-                'remove_private_as': remove_private_as,
-                'prefix_limit': prefix_l,
-                }
+            parms = self._extract_fields(BGP_GROUP_FIELDS, bgp_group)
+            bgp_groups_parms[parms.pop('group')] = parms
         return bgp_groups_parms
 
     def _get_bgp_group_section(self, bgp_group_response):
-        g_groups = re.findall('^Group\s+:\s(.*)',
-                            bgp_group_response, re.MULTILINE)
-        groups = [group.rstrip() for group in g_groups]
-        group_list_section = []
-        groups_len = len(groups)
-        for group in groups:
-            g_index = groups.index(group)
-            g_search = re.search(r'(Group[ ]{{1,12}}: {})'.format(group),
-                               bgp_group_response).group(1)
-            group_start = bgp_group_response.index(g_search)
-            section = bgp_group_response[group_start:]
-            if (g_index + 1) == groups_len:
-                group_sect = section
-            else:
-                group_end = section.index(': {}'.format(groups[g_index +1]))
-                group_sect = section[:group_end]
-            group_list_section.append(group_sect)
-        return group_list_section
+        return self._split_sections(BGP_GROUP_START_RE, bgp_group_response)
 
+    @instrumented
+    @snapshot
+    @cached_result
     def get_bgp_neighbors(self, vrf=''):
-        neighbors_parms = {}
+        if vrf == 'all':
+            vrfs = self._vrf_list()
+            return self._parse_bgp_neighbors_all(vrfs, self.command_batch(self._bgp_neighbors_all_commands(vrfs)))
         bgp_response = self.command('/show router {} '
                                         'bgp summary\n'.format(vrf))
         if bgp_response:
-            loc_as = self._search_func('Local AS:(\d+)', bgp_response, 0)
+            bgp_n_parms = self._get_bgp_neighbors_config(vrf)
+            return shape(BgpNeighbor, self._parse_bgp_neighbors(bgp_response, bgp_n_parms, vrf),
+                         self.result_format, vrf=vrf or 'global')
+
+    @timed_parse
+    def _parse_bgp_neighbors(self, bgp_response, bgp_n_parms, vrf=''):
+        neighbors_parms = []
+        if bgp_response:
+            loc_as = int(self._search_func('Local AS:(\d+)', bgp_response, 0))
             router_id = self._search_func('BGP Router ID:(\d+.\d+.\d+.\d+)',
                                                     bgp_response, 0)
             neighbors = self._get_bgp_summary_section(bgp_response)
@@ -274,7 +1037,6 @@ class SROSDriver(object):
                 vrf_id = vrf
             else:
                 vrf_id = 'global'
-            neighbors_parms[vrf_id] = {}
             for neighbor_sec in neighbors:
                 neighbor = re.search(r'^(\d+.\d+.\d+.\d+)',
                                      neighbor_sec).group(1)
@@ -284,9 +1046,7 @@ class SROSDriver(object):
                 uptime = self._search_func('(\d+[dhmsy]\d\d[dhms]\d\d[hms])',
                                                         neighbor_sec, False)
                 n_split_sec = neighbor_sec.splitlines()[1:]
-                bgp_conf = self.get_bgp_config(group='',
-                                            neighbor=neighbor, vrf=vrf)
-                peer_as = bgp_conf['remote_as']
+                peer_as = bgp_n_parms.get(neighbor, {}).get('remote_as', 0)
                 if re.search(r'(\d+)/(\d+)/(\d+)', neighbor_sec):
                     is_up = True
                     bgp_state = 'Established'
@@ -294,140 +1054,218 @@ class SROSDriver(object):
                     is_up = False
                     bgp_state = self._search_func('{}\s(\w+)'.format(uptime),
                                                   neighbor_sec, False)
-                family_dict = {}
+                families = []
                 for section in n_split_sec:
                     if is_enabled:
                         family = self._search_func('\((.*)\)', section, False)
                         if family:
                             prefixes = re.search(r'(\d+)/(\d+)/(\d+)', section)
-                            r_pref = prefixes.group(1)
-                            a_pref = prefixes.group(2)
-                            s_pref = prefixes.group(3)
-                            family_dict[family] = {'received_prefixes': r_pref,
-                                                'accepted_prefixes': a_pref,
-                                                'sent_prefixes': s_pref}
-                neighbors_parms[vrf_id].update({neighbor: {
-                    'local_as': loc_as,
-                    'remote_as': peer_as,
-                    'router_id': router_id,
-                    'uptime': uptime,
-                    'remote_id': neighbor,
-                    'is_enabled': is_enabled,
-                    'bgp_state': bgp_state,
-                    'is_up': is_up,
-                    'address_family': family_dict}})
-            return neighbors_parms
+                            families.append(AddressFamily(family, *map(int, prefixes.groups())))
+                neighbors_parms.append(BgpNeighbor(
+                    vrf_id, neighbor, loc_as, peer_as, router_id, uptime, neighbor, is_enabled,
+                    bgp_state, is_up, tuple(families)))
+        return neighbors_parms
+
+    def _bgp_neighbors_all_commands(self, vrfs):
+        return [cmd for vrf in vrfs for cmd in ('/show router {} bgp summary\n'.format(vrf),
+                                                '/show router {} bgp neighbor\n'.format(vrf))]
+
+    def _parse_bgp_neighbors_all(self, vrfs, outputs):
+        rows = []
+        for vrf, bgp_response, neighbor_response in zip(vrfs, outputs[::2], outputs[1::2]):
+            bgp_n_parms = self._parse_bgp_neighbors_config(neighbor_response)
+            rows += self._parse_bgp_neighbors(bgp_response, bgp_n_parms, vrf)
+        return shape(BgpNeighbor, rows, self.result_format, vrfs=[vrf or 'global' for vrf in vrfs])
+
+    def _vrf_list(self):
+        """'' for the base router followed by the id of every VPRN service."""
+        if self.config_index:
+            return [''] + vprn_ids(self.get_config_index())
+        return [''] + VPRN_SERVICE_RE.findall(self.command('/show service service-using vprn\n'))
 
     def _get_bgp_summary_section(self, bgp_response):
-        neighbors = re.findall(r'^(\d+.\d+.\d+.\d+)', bgp_response,
-                                                            re.MULTILINE)
-        neighbors = [x.strip() for x in neighbors]
-        neighbors_list_section = []
-        neighbors_len = len(neighbors)
-        for neighbor in neighbors:
-            n_index = neighbors.index(neighbor)
-            n_search = re.search(r'^({})\D+'.format(neighbor),
-                                 bgp_response, re.MULTILINE).group(1)
-            neighbor_start = bgp_response.index(n_search)
-            section = bgp_response[neighbor_start:]
-            if (n_index + 1) == neighbors_len:
-                neighbor_sect = section
-            else:
-                neighbor_end = section.index('{}'.format(neighbors[n_index + 1]))
-                neighbor_sect = section[:neighbor_end]
-            neighbors_list_section.append(neighbor_sect)
-        return neighbors_list_section
+        return self._split_sections(BGP_SUMMARY_START_RE, bgp_response)
+
+    def _split_sections(self, start_re, response):
+        """Cut `response` into records, each running from a `start_re` match to the next one."""
+        starts = [match.start() for match in start_re.finditer(response)]
+        ends = starts[1:] + [len(response)]
+        return [response[start:end] for start, end in zip(starts, ends)]
 
+    @instrumented
+    @snapshot
+    @cached_result
     def get_bgp_config_detail(self, neighbor='', vrf=''):
+        if vrf == 'all':
+            vrfs = self._vrf_list()
+            summaries = self.command_batch(['/show router {} bgp summary\n'.format(vrf) for vrf in vrfs])
+            peer_vrfs, neighbors = self._summary_peers(vrfs, summaries, neighbor)
+            return self._shape_detail_all(vrfs, peer_vrfs, self._get_bgp_neigh_detail(neighbors, vrf=peer_vrfs))
         bgp_response = self.command('/show router {} bgp summary\n'.format(vrf))
         neighbors = re.findall(r'^(\d+.\d+.\d+.\d+)', bgp_response, re.M)
         if neighbor:
             neighbors = [neighbor]
         bgp_details = self._get_bgp_neigh_detail(neighbors, vrf=vrf)
-        return bgp_details
+        return shape(BgpNeighborDetail, bgp_details, self.result_format)
+
+    def _summary_peers(self, vrfs, summaries, neighbor=''):
+        """VRF and address of every peer in the summaries, or of `neighbor` in each VRF listing it."""
+        peer_vrfs, neighbors = [], []
+        for vrf, bgp_response in zip(vrfs, summaries):
+            for peer in re.findall(r'^(\d+.\d+.\d+.\d+)', bgp_response, re.M):
+                if not neighbor or peer == neighbor:
+                    peer_vrfs.append(vrf)
+                    neighbors.append(peer)
+        return peer_vrfs, neighbors
+
+    def _shape_detail_all(self, vrfs, peer_vrfs, details):
+        rows = dict((vrf, []) for vrf in vrfs)
+        for vrf, row in zip(peer_vrfs, details):
+            rows[vrf].append(row)
+        return dict((vrf or 'global', shape(BgpNeighborDetail, rows[vrf], self.result_format)) for vrf in vrfs)
 
     def _get_bgp_neigh_detail(self, neighbors_list, vrf=''):
-        bgp_neighbors_parms = {}
-        for neighbor in neighbors_list:
-            show = '/show router {}'.format(vrf).rstrip()
-            bgp_response = self.command('{} bgp neighbor {} '
-                            'detail\n'.format(show, neighbor))
-            is_up = self._search_func('State\s+:\s(Established)', bgp_response, '')
-            if is_up:
-                x_is_up = True
-            else:
-                x_is_up = False
-            loc_as = self._search_func('Local AS\s+:\s(\S+)', bgp_response, 0)
-            peer_as = self._search_func('Peer AS\s+:\s(\S+)', bgp_response, 0)
-            router_id = neighbor
-            loc_add = self._search_func('Local Address\s+:\s(\d+.\d+.\d+.\d+)',
-                                        bgp_response, '')
-            remote_add = self._search_func('Peer Address\s+:\s(\d+.\d+.\d+.\d+)',
-                                        bgp_response, '')
-            loc_port = self._search_func('Local Port\s+:\s(\d+)',
-                                        bgp_response, '')
-            multihop = self._search_func('Multihop\s+:\s(\d+)',
-                                         bgp_response, '')
-            r_multihop = not multihop
-            mutltipath = self._search_func('Local AddPath\.*:\s(Disabled)',
-                                         bgp_response, '')
-            r_multipath = not mutltipath
-            remove_priv = self._search_func('Remove Private\s+:\s(Disabled)',
-                                           bgp_response, '')
-            r_remove_priv = not remove_priv
-            bgp_group = self._search_func('Group\s+:\s(.*)', bgp_response, '')
-            cmd = '/configure router bgp group {} neighbor '\
-                            '{}\ninfo\n'.format(bgp_group, neighbor)
-            policy_check = self.command(cmd)
-            import_policies = self._policy_search('import', policy_check)
-            export_policies = self._policy_search('export', policy_check)
-            in_mess = self._search_func('i/p Messages\s+:\s(\d+)', bgp_response, 0)
-            out_mess = self._search_func('o/p Messages\s+:\s(\d+)', bgp_response, 0)
-            in_update = self._search_func('i/p Updates\s+:\s(\d+)', bgp_response, 0)
-            out_update = self._search_func('o/p Updates\s+:\s(\d+)', bgp_response, 0)
-            m_queued_out = self._search_func('Output Queue\s+:\s(\d+)', bgp_response, 0)
-            state = self._search_func('State\s+:\s(\w+)', bgp_response, '')
-            prev_state = self._search_func('Last State\s+:\s(\w+)', bgp_response, '')
-            last_state = self._search_func('Last Event\s+:\s(\w+)', bgp_response, '')
-            hold_time = self._search_func('Hold Time\s+:\s(\w+)', bgp_response, 0)
-            keepalive = self._search_func('Keep Alive\s+:\s(\w+)', bgp_response, 0)
-            active_ipv4 = self._search_func('IPv4 Active Prefixes\s+:\s(\w+)', bgp_response, 0)
-            active_vpn_ipv4 = self._search_func('VPN-IPv4 Active Pfxs\s+:\s(\w+)', bgp_response, 0)
-            receive_ipv4 = self._search_func('IPv4 Recd. Prefixes\s+:\s(\w+)', bgp_response, 0)
-            receive_vpn_ipv4 = self._search_func('VPN-IPv4 Recd. Pfxs\s+:\s(\w+)', bgp_response, 0)
-            sup_pfx_count = self._search_func('IPv4 Suppressed Pfxs\s+:\s(\w+)', bgp_response, 0)
-            sup_pfx_count_vpn = self._search_func('VPN-IPv4 Suppr. Pfxs\s+:\s(\w+)', bgp_response, 0)
-            flap = self._search_func('Num of Update Flaps\s+:\s(\w+)', bgp_response, 0)
-            bgp_neighbors_parms[neighbor] = {
-                'is_up': x_is_up,
-                'local_as': loc_as,
-                'remote_as': peer_as,
-                'router_id': router_id,
-                'local_address': loc_add,
-                'remote_add': remote_add,
-                'loc_port': loc_port,
-                'multihop': r_multihop,
-                'multipath': r_multipath,
-                'remove_private_as': r_remove_priv,
-                'import_policy': import_policies,
-                'export_policy': export_policies,
-                'input_messages': in_mess,
-                'output_messages': out_mess,
-                'input_updates': in_update,
-                'output_updates': out_update,
-                'messages_queued_out': m_queued_out,
-                'connection_state': state,
-                'previous_connection_state': prev_state,
-                'last_event': last_state,
-                'holdtime': hold_time,
-                'keepalive': keepalive,
-                'active_prefix_count': active_ipv4,
-                'active_pfx_vpn_ipv4_count': active_vpn_ipv4,
-                'receive_prefix_count': receive_ipv4,
-                'receive_pfx_vpn_ipv4_count': receive_vpn_ipv4,
-                'suppressed_prefix_count': sup_pfx_count,
-                'suppressed_pfx_count_vpn_ipv4': sup_pfx_count_vpn,
-                'flap_count': flap}
+        """Detail rows of `neighbors_list`; `vrf` is one VRF for all of them or a list with one per neighbor."""
+        details = self.command_batch(self._bgp_detail_commands(neighbors_list, vrf))
+        if self.config_index:
+            neighbor_policies = self._index_policies(self.get_config_index(), neighbors_list, vrf)
+        else:
+            policy_checks = self._command_batch(self._bgp_policy_commands(neighbors_list, details, vrf),
+                                                invalidate=False)
+            neighbor_policies = [(self._policy_search('import', policy_check),
+                                  self._policy_search('export', policy_check))
+                                 for policy_check in policy_checks]
+        return self._parse_bgp_neigh_detail(neighbors_list, details, neighbor_policies)
+
+    @instrumented
+    def get_config_index(self, refresh=False):
+        """Running configuration as a SROSConfig.ConfigNode tree.
+
+        `admin display-config` is read once and the tree is kept until a
+        configuration change is sent through this driver (or `refresh`).
+        """
+        if self._config_index is None or refresh:
+            self._config_index = self._parse_config(self.command('admin display-config'))
+        return self._config_index
+
+    @timed_parse
+    def _parse_config(self, output):
+        return parse_config(output)
+
+    def _index_policies(self, index, neighbors_list, vrf=''):
+        nodes = {}
+        neighbor_policies = []
+        for neighbor, peer_vrf in zip(neighbors_list, self._peer_vrfs(neighbors_list, vrf)):
+            if peer_vrf not in nodes:
+                nodes[peer_vrf] = bgp_neighbors(index, peer_vrf)
+            neighbor_policies.append(policies(nodes[peer_vrf].get(neighbor)))
+        return neighbor_policies
+
+    def _peer_vrfs(self, neighbors_list, vrf=''):
+        return vrf if isinstance(vrf, list) else [vrf] * len(neighbors_list)
+
+    @instrumented
+    def get_bgp_neighbors_delta(self, vrf=''):
+        """get_bgp_neighbors() as peers added, changed and removed since the previous call for this device.
+
+        The neighbor configuration (for the peer AS) is only read again when
+        the summary lists a peer that is not in the previous snapshot.
+        """
+        bgp_response = self.command('/show router {} bgp summary\n'.format(vrf))
+        snapshot = self._delta_snapshot('get_bgp_neighbors', vrf)
+        bgp_n_parms = dict((peer, {'remote_as': row.remote_as}) for peer, row in snapshot['rows'].items())
+        if any(peer not in bgp_n_parms for peer in self._summary_records(bgp_response)):
+            bgp_n_parms = self._get_bgp_neighbors_config(vrf)
+        rows = self._parse_bgp_neighbors(bgp_response, bgp_n_parms, vrf)
+        return self._delta(BgpNeighbor, snapshot, rows, vrf=vrf or 'global')
+
+    @instrumented
+    def get_bgp_config_detail_delta(self, vrf=''):
+        """get_bgp_config_detail() as peers added, changed and removed since the previous call for this device.
+
+        Detail and policies are only fetched for peers whose summary record
+        (state, uptime, message and prefix counters) differs from the previous
+        poll; the others keep their previous detail.
+        """
+        summary = self._summary_records(self.command('/show router {} bgp summary\n'.format(vrf)))
+        snapshot = self._delta_snapshot('get_bgp_config_detail', vrf)
+        stale = [peer for peer, record in summary.items()
+                 if snapshot['summary'].get(peer) != record or peer not in snapshot['rows']]
+        fetched = dict((row.peer, row) for row in self._get_bgp_neigh_detail(stale, vrf=vrf))
+        rows = [fetched[peer] if peer in fetched else snapshot['rows'][peer] for peer in summary]
+        snapshot['summary'] = summary
+        return self._delta(BgpNeighborDetail, snapshot, rows)
+
+    def _summary_records(self, bgp_response):
+        records = OrderedDict()
+        for record in self._get_bgp_summary_section(bgp_response):
+            records[BGP_SUMMARY_START_RE.match(record).group(0)] = record
+        return records
+
+    def _delta_snapshot(self, getter, vrf):
+        return self.delta_store.setdefault((self.hostname, getter, vrf), {'rows': {}, 'summary': {}})
+
+    def _delta(self, record, snapshot, rows, **kwargs):
+        """Compare `rows` with the snapshot, replace the snapshot and return added/changed/removed peers."""
+        previous = snapshot['rows']
+        current = OrderedDict((row.peer, row) for row in rows)
+        added = [row for peer, row in current.items() if peer not in previous]
+        changed = [row for peer, row in current.items() if peer in previous and previous[peer] != row]
+        removed = [peer for peer in previous if peer not in current]
+        snapshot['rows'] = current
+        return {'added': shape(record, added, self.result_format, **kwargs),
+                'changed': shape(record, changed, self.result_format, **kwargs),
+                'removed': removed}
+
+    def _bgp_detail_commands(self, neighbors_list, vrf=''):
+        return ['{} bgp neighbor {} detail'.format('/show router {}'.format(peer_vrf).rstrip(), neighbor)
+                for neighbor, peer_vrf in zip(neighbors_list, self._peer_vrfs(neighbors_list, vrf))]
+
+    def _bgp_policy_commands(self, neighbors_list, details, vrf=''):
+        bgp_groups = [self._search_func('Group\s+:\s(.*)', bgp_response, '')
+                      for bgp_response in details]
+        return ['/configure {} bgp group {} neighbor {}\ninfo\nexit all'.format(
+                    'service vprn {}'.format(peer_vrf) if peer_vrf else 'router', bgp_group, neighbor)
+                for bgp_group, neighbor, peer_vrf in zip(bgp_groups, neighbors_list,
+                                                         self._peer_vrfs(neighbors_list, vrf))]
+
+    @timed_parse
+    def _parse_bgp_neigh_detail(self, neighbors_list, details, neighbor_policies):
+        bgp_neighbors_parms = []
+        for neighbor, bgp_response, (import_policy, export_policy) in zip(neighbors_list, details,
+                                                                          neighbor_policies):
+            parms = self._extract_fields(BGP_DETAIL_FIELDS, bgp_response)
+            bgp_neighbors_parms.append(BgpNeighborDetail(
+                peer=neighbor,
+                is_up=parms['connection_state'] == 'Established',
+                local_as=parms['local_as'],
+                remote_as=parms['remote_as'],
+                router_id=neighbor,
+                local_address=parms['local_address'],
+                remote_add=parms['remote_add'],
+                loc_port=parms['loc_port'],
+                multihop=parms['multihop'] > 0,
+                multipath=parms['multipath'],
+                remove_private_as=parms['remove_private_as'],
+                import_policy=import_policy,
+                export_policy=export_policy,
+                input_messages=parms['input_messages'],
+                output_messages=parms['output_messages'],
+                input_updates=parms['input_updates'],
+                output_updates=parms['output_updates'],
+                messages_queued_out=parms['messages_queued_out'],
+                connection_state=parms['connection_state'],
+                previous_connection_state=parms['previous_connection_state'],
+                last_event=parms['last_event'],
+                holdtime=parms['holdtime'],
+                keepalive=parms['keepalive'],
+                active_prefix_count=parms['active_prefix_count'],
+                active_pfx_vpn_ipv4_count=parms['active_pfx_vpn_ipv4_count'],
+                receive_prefix_count=parms['receive_prefix_count'],
+                receive_pfx_vpn_ipv4_count=parms['receive_pfx_vpn_ipv4_count'],
+                suppressed_prefix_count=parms['suppressed_prefix_count'],
+                suppressed_pfx_count_vpn_ipv4=parms['suppressed_pfx_count_vpn_ipv4'],
+                flap_count=parms['flap_count']))
         return bgp_neighbors_parms
 
     def _policy_search(self, direction, bgp_response):
@@ -461,84 +1299,120 @@ class SROSDriver(object):
             ser_object = ser_object.strip()
         return ser_object
 
+    def _extract_fields(self, table, record):
+        """Fill every field of a `_field_table` from one scan of `record`; the first occurrence of a label wins."""
+        regex, fields = table
+        found = {}
+        for match in regex.finditer(record):
+            if match.lastgroup not in found:
+                found[match.lastgroup] = match.group(match.lastgroup)
+        parms = {}
+        for name, _, _, convert, default in fields:
+            value = found.get(name)
+            if value is not None:
+                value = convert(value.strip())
+            parms[name] = default if value is None else value
+        return parms
+
+    @instrumented
     def check_file_exists(self, dest_file):
-        self.device.send("\n/environment no more\n")
-        time.sleep(1)
-        self.device.send('file dir {}\n'.format(dest_file))
-        time.sleep(1)
-        output = self.device.recv(65535)
+        output = self.command('file dir {}'.format(dest_file))
         if 'CLI File Not Found' in output:
             return False
         else:
             return True
 
+    @instrumented
     def delete_file(self, dest_file):
-        self.device.send("\n/environment no more\n")
-        self.device.send('file delete {}\n'.format(dest_file))
-        time.sleep(1)
-        self.device.send('y')
-        time.sleep(1)
-        output = self.device.recv(65535)
+        output = self.command('file delete {} force'.format(dest_file))
         if 'OK' in output:
             return True
         else:
             return False
 
+    @instrumented
     def check_free_space(self, source_file):
-        self.device.send("\n/environment no more\n")
-        time.sleep(1)
-        self.device.send('file dir\n')
-        time.sleep(1)
-        output = self.device.recv(65535)
-        free_space = re.search('(\d+) bytes free', output)
-        if free_space:
-            free_space = free_space.group(1)
-            file_size = os.stat(source_file).st_size
-            if free_space > file_size:
-                return True
-            else:
-                return False
-        else:
-            return False
+        output = self.command('file dir')
+        return self._has_free_space(output, source_file)
+
+    def _has_free_space(self, output, source_file):
+        return self._free_bytes(output) > os.stat(source_file).st_size
+
+    def _free_bytes(self, output):
+        free_space = FILE_FREE_RE.search(output)
+        return int(free_space.group(1)) if free_space else 0
 
+    def _dir_size(self, output):
+        size = FILE_SIZE_RE.search(output)
+        return int(size.group(1)) if size else 0
+
+    @instrumented
     def rollback_save(self):
-        self.device.send("\n/environment no more\n")
-        time.sleep(1)
-        self.device.send('admin rollback save\n')
-        time.sleep(1)
-        output = self.device.recv(65535)
+        output = self.command('admin rollback save')
         if 'OK' in output:
             return True
         else:
             return False
 
+    @instrumented
     def rollback_view(self):
-        self.device.send("\n/environment no more\n")
-        time.sleep(1)
-        self.device.send('admin rollback view\n')
-        time.sleep(1)
-        output = self.device.recv(65535)
-        return output
+        """Rollback checkpoints listed by `admin rollback view`, newest first."""
+        return shape(RollbackEntry, self._iter_parsed('admin rollback view\n', RollbackIndex()),
+                     self.result_format)
 
+    def iter_rollback_view(self):
+        for entry in self._iter_parsed('admin rollback view\n', RollbackIndex()):
+            yield dict(zip(entry._fields, entry)) if self.result_format == 'dict' else entry
+
+    @instrumented
     def rollback_compare(self, rollback_id):
-        self.device.send("\n/environment no more\n")
-        time.sleep(1)
-        self.device.send('admin rollback compare {} to active-cfg\n'.format(rollback_id))
-        time.sleep(1)
-        output = self.device.recv(65535)
-        return output
+        """Changes between checkpoint `rollback_id` and the active configuration, one hunk per context."""
+        return shape(ConfigHunk, self._iter_parsed(self._rollback_compare_command(rollback_id), ConfigDiff()),
+                     self.result_format)
 
-    def exec_file(self, dest_file):
-        self.device.send("exec {}\n".format(dest_file))
-        output = ''
-        endTime = datetime.datetime.now() + datetime.timedelta(seconds=60)
-        while True:
-            data = self.device.recv(2000)
-            if datetime.datetime.now() >= endTime and output == '':
-                break
-            elif "failed" in data or 'Executed' in data:
-                output += data
-                break
-            else:
-                output += data
-        return output
\ No newline at end of file
+    def iter_rollback_compare(self, rollback_id):
+        """Yield rollback_compare() hunks as the diff is received, keeping only the current hunk."""
+        for hunk in self._iter_parsed(self._rollback_compare_command(rollback_id), ConfigDiff()):
+            yield ConfigHunk.to_napalm([hunk])[0] if self.result_format == 'dict' else hunk
+
+    def _rollback_compare_command(self, rollback_id):
+        return 'admin rollback compare {} to active-cfg\n'.format(rollback_id)
+
+    def _iter_parsed(self, text, parser):
+        """Stream the output of `text` through an incremental `parser` (feed/close) and yield its records."""
+        for line in self._stream_lines(text):
+            record = parser.feed(line)
+            if record is not None:
+                yield record
+        record = parser.close()
+        if record is not None:
+            yield record
+
+    @instrumented
+    def exec_file(self, dest_file, progress=None):
+        return self.exec_file_report(dest_file, progress)['output']
+
+    @instrumented
+    def exec_file_report(self, dest_file, progress=None, size=None):
+        """Run `exec -echo dest_file` and report the run per line of the file.
+
+        Output is read as it arrives; `progress(line, text)` is called for every
+        output line, `line` being the number of the file line executing. The
+        deadline is `timeout` plus `size` bytes (from `file dir` if not given)
+        at `exec_rate` bytes per second; `idle_timeout` grows in proportion.
+        """
+        if size is None:
+            size = self._file_size(dest_file)
+        timeout, idle_timeout = self._exec_timeouts(size)
+        report = ExecReport(progress)
+        for text in self._stream_lines('exec -echo {}\n'.format(dest_file), until=EXEC_DONE_RE,
+                                       timeout=timeout, idle_timeout=idle_timeout):
+            report.feed(text)
+        return report.result()
+
+    def _exec_timeouts(self, size):
+        timeout = self.timeout + size / float(self.exec_rate)
+        return timeout, self.idle_timeout * timeout / self.timeout
+
+    def _file_size(self, dest_file):
+        return self._dir_size(self.command('file dir {}'.format(dest_file)))
\ No newline at end of file
@@ -0,0 +1,612 @@
+#!/usr/bin/env python
+
+import json
+import os
+import random
+import re
+import socket
+import threading
+import time
+
+import paramiko
+
+BANNER = 'SR OS Software\r\nCopyright (c) Nokia.\r\nAll rights reserved.\r\n\r\n'
+PAGE_PROMPT = 'Press any key to continue (Q to quit)'
+BAD_COMMAND = 'Error: Bad command.'
+MATCH_RE = re.compile(r'^(.*?)\s*\|\s*match\s+"?([^"]*?)"?( expression)?$')
+
+
+def normalize(cmd):
+    """Transcript key for a CLI line: leading '/' dropped, whitespace collapsed."""
+    return ' '.join(cmd.strip().lstrip('/').split())
+
+
+def load_transcript(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_transcript(transcript, path):
+    with open(path, 'w') as f:
+        json.dump(transcript, f, indent=2, sort_keys=True)
+
+
+def record_transcript(driver, commands):
+    """Run `commands` on an open SROSDriver and return them as a transcript.
+
+    Echo and prompt lines are stripped, so the result can be replayed by
+    SROSFakeDevice or saved with save_transcript().
+    """
+    transcript = {}
+    for cmd in commands:
+        output = driver.command(cmd)
+        block = driver._split_prompt_blocks(output, 1)[0]
+        transcript[normalize(cmd)] = '\n'.join(block.replace('\r', '').split('\n')[1:]).rstrip('\n')
+    return transcript
+
+
+class SROSFakeDevice(object):
+    """Loopback SSH server replaying SR OS CLI transcripts.
+
+    `transcript` maps normalized commands (see normalize()) to their output.
+    `| match` filters (`expression` for a regex) are applied to the output of the base command, and
+    `info` inside a configure context looks up '<context> info'. Until
+    'environment no more' is sent, output longer than `page_lines` is paged.
+    Each answer is delayed by `latency` plus up to `jitter` seconds.
+
+    `files` (path -> bytes) is the flash: `file dir`/`file delete` answer
+    from it, and files are written and read with scp and SFTP on further
+    channels of the same connection. `free_bytes` is reported as free space.
+    """
+
+    def __init__(self, transcript, hostname='SR-A', latency=0, jitter=0, page_lines=0, chunk_size=4096,
+                 files=None, free_bytes=1 << 30):
+        self.transcript = transcript
+        self.files = {} if files is None else files
+        self.free_bytes = free_bytes
+        self.hostname = hostname
+        self.latency = latency
+        self.jitter = jitter
+        self.page_lines = page_lines
+        self.chunk_size = chunk_size
+        self.host_key = paramiko.RSAKey.generate(2048)
+        self.commands = []
+        self.bytes_sent = 0
+        self.port = None
+        self._sock = None
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(('127.0.0.1', 0))
+        self._sock.listen(100)
+        self.port = self._sock.getsockname()[1]
+        thread = threading.Thread(target=self._accept)
+        thread.daemon = True
+        thread.start()
+        return self.port
+
+    def stop(self):
+        self._closed.set()
+        if self._sock is not None:
+            self._sock.close()
+
+    def _accept(self):
+        while not self._closed.is_set():
+            try:
+                client, _ = self._sock.accept()
+            except (socket.error, OSError):
+                return
+            thread = threading.Thread(target=self._serve, args=(client,))
+            thread.daemon = True
+            thread.start()
+
+    def _serve(self, client):
+        transport = paramiko.Transport(client)
+        transport.add_server_key(self.host_key)
+        transport.set_subsystem_handler('sftp', _SFTPServer, _MemorySFTP, self)
+        server = _SSHServer()
+        try:
+            transport.start_server(server=server)
+            while transport.is_active() and not self._closed.is_set():
+                channel = transport.accept(1)
+                if channel is not None:
+                    thread = threading.Thread(target=self._channel, args=(server, channel))
+                    thread.daemon = True
+                    thread.start()
+        except (EOFError, socket.error, paramiko.SSHException):
+            pass
+        finally:
+            transport.close()
+
+    def _channel(self, server, channel):
+        request = server.wait_request(channel, 30)
+        try:
+            if request == 'shell':
+                _Session(self, channel).run()
+            elif request is not None and request.startswith('scp -t '):
+                self._scp_sink(channel, request[len('scp -t '):].strip('\'"'))
+        except (EOFError, socket.error, paramiko.SSHException):
+            pass
+
+    def _scp_sink(self, channel, path):
+        """Receive files sent with `scp -t path` (what SCPClient.put() runs) into `files`."""
+        stream = channel.makefile('rb')
+        channel.sendall(b'\0')
+        while True:
+            header = stream.readline()
+            if not header:
+                break
+            if header.startswith(b'C'):
+                _, size, name = header.decode('utf-8').rstrip('\n').split(' ', 2)
+                channel.sendall(b'\0')
+                data = stream.read(int(size))
+                stream.read(1)
+                with self._lock:
+                    self.files[path + name if path.endswith('/') else path] = data
+            channel.sendall(b'\0')
+        with channel.lock:
+            # clients such as asyncssh close right after the last OK; a status sent after
+            # their close makes them drop the whole connection
+            if not channel.closed:
+                channel.send_exit_status(0)
+        channel.close()
+
+    def file_dir(self, path):
+        """`file dir [path]` output for the flash in `files`."""
+        names = sorted(name for name in self.files if not path or name == path)
+        if path and not names:
+            return 'CLI File Not Found "{}"'.format(path)
+        size = sum(len(self.files[name]) for name in names)
+        lines = ['', 'Volume in drive cf3 on slot A is /flash.', '', 'Directory of cf3:\\', '']
+        lines += ['10/18/2026  10:21a {:>20} {}'.format(len(self.files[name]), os.path.basename(name))
+                  for name in names]
+        lines += ['{:>16} File(s) {:>20} bytes.'.format(len(names), size),
+                  '{:>16} Dir(s) {:>21} bytes free.'.format(0, self.free_bytes)]
+        return '\n'.join(lines)
+
+    def file_delete(self, path):
+        with self._lock:
+            if self.files.pop(path, None) is None:
+                return 'CLI File Not Found "{}"'.format(path)
+        return 'OK'
+
+    def _record(self, cmd, sent):
+        with self._lock:
+            if cmd is not None:
+                self.commands.append(cmd)
+            self.bytes_sent += sent
+
+    def lookup(self, cmd, context):
+        key = normalize(cmd)
+        if key in self.transcript:
+            return self.transcript[key]
+        if key.split(' ')[:2] == ['file', 'dir']:
+            return self.file_dir(key[len('file dir'):].strip())
+        if key.startswith('file delete '):
+            return self.file_delete(key.split(' ')[2])
+        if key == 'info' and context:
+            return self.transcript.get(context + ' info', '')
+        match = MATCH_RE.match(key)
+        if match and match.group(1) in self.transcript:
+            pattern = match.group(2)
+            if match.group(3):
+                pattern = re.compile(pattern)
+                return '\n'.join(line for line in self.transcript[match.group(1)].split('\n')
+                                 if pattern.search(line))
+            return '\n'.join(line for line in self.transcript[match.group(1)].split('\n')
+                             if pattern in line)
+        if not key or key.startswith(('configure', 'environment', 'exit')):
+            return ''
+        return BAD_COMMAND
+
+
+class _SSHServer(paramiko.ServerInterface):
+    """Accepts any password; remembers whether each channel asked for a shell or an exec command."""
+
+    def __init__(self):
+        self.requests = {}
+        self._ready = threading.Condition()
+
+    def _request(self, channel, request):
+        with self._ready:
+            self.requests[channel.get_id()] = request
+            self._ready.notify_all()
+
+    def wait_request(self, channel, timeout):
+        deadline = time.time() + timeout
+        with self._ready:
+            while channel.get_id() not in self.requests and time.time() < deadline:
+                self._ready.wait(deadline - time.time())
+            return self.requests.get(channel.get_id())
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED_OR_UNKNOWN_CHANNEL_TYPE
+
+    def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        self._request(channel, 'shell')
+        return True
+
+    def check_channel_exec_request(self, channel, command):
+        if not command.startswith(b'scp -t '):
+            return False
+        self._request(channel, command.decode('utf-8'))
+        return True
+
+    def check_channel_subsystem_request(self, channel, name):
+        self._request(channel, 'subsystem')
+        return paramiko.ServerInterface.check_channel_subsystem_request(self, channel, name)
+
+
+class _SFTPServer(paramiko.SFTPServer):
+    """SFTP without the check-file extension, which SR OS does not offer either."""
+
+    def _check_file(self, request_number, msg):
+        self._send_status(request_number, paramiko.SFTP_OP_UNSUPPORTED)
+
+
+class _MemorySFTP(paramiko.SFTPServerInterface):
+    """SFTP over the fake device's `files`."""
+
+    def __init__(self, server, device):
+        paramiko.SFTPServerInterface.__init__(self, server)
+        self.device = device
+
+    def open(self, path, flags, attr):
+        if flags & (os.O_WRONLY | os.O_RDWR):
+            with self.device._lock:
+                if flags & os.O_TRUNC or path not in self.device.files:
+                    self.device.files[path] = b''
+        elif path not in self.device.files:
+            return paramiko.SFTP_NO_SUCH_FILE
+        return _MemoryHandle(self.device, path, flags)
+
+    def stat(self, path):
+        if path not in self.device.files:
+            return paramiko.SFTP_NO_SUCH_FILE
+        return _file_attributes(self.device.files[path])
+
+    lstat = stat
+
+    def remove(self, path):
+        return paramiko.SFTP_OK if self.device.file_delete(path) == 'OK' else paramiko.SFTP_NO_SUCH_FILE
+
+
+class _MemoryHandle(paramiko.SFTPHandle):
+
+    def __init__(self, device, path, flags):
+        paramiko.SFTPHandle.__init__(self, flags)
+        self.device = device
+        self.path = path
+
+    def read(self, offset, length):
+        return self.device.files[self.path][offset:offset + length]
+
+    def write(self, offset, data):
+        with self.device._lock:
+            content = self.device.files[self.path]
+            self.device.files[self.path] = content[:offset].ljust(offset, b'\0') + data + content[offset + len(data):]
+        return paramiko.SFTP_OK
+
+    def stat(self):
+        return _file_attributes(self.device.files[self.path])
+
+
+def _file_attributes(data):
+    attr = paramiko.SFTPAttributes()
+    attr.st_size = len(data)
+    attr.st_mode = 0o100644
+    return attr
+
+
+class _Session(object):
+    """One interactive shell: echo each line, answer it and print the prompt again."""
+
+    def __init__(self, device, channel):
+        self.device = device
+        self.channel = channel
+        self.more = True
+        self.context = ''
+        self.buffer = ''
+
+    def prompt(self):
+        if self.context:
+            return 'A:{}>config# '.format(self.device.hostname)
+        return 'A:{}# '.format(self.device.hostname)
+
+    def send(self, text):
+        data = text.encode('utf-8')
+        for start in range(0, len(data), self.device.chunk_size):
+            self.channel.sendall(data[start:start + self.device.chunk_size])
+        return len(data)
+
+    def readline(self):
+        while '\n' not in self.buffer and '\r' not in self.buffer:
+            data = self.channel.recv(4096)
+            if not data:
+                return None
+            self.buffer += data.decode('utf-8', 'replace')
+        line, _, self.buffer = re.split('(\r\n|\n|\r)', self.buffer, 1)
+        return line
+
+    def run(self):
+        self.device._record(None, self.send(BANNER + self.prompt()))
+        while True:
+            line = self.readline()
+            if line is None:
+                return
+            sent = self.send(line + '\r\n')
+            sent += self.answer(line)
+            sent += self.send(self.prompt())
+            self.device._record(line, sent)
+
+    def answer(self, line):
+        key = normalize(line)
+        if key == 'environment no more':
+            self.more = False
+        elif key == 'exit all':
+            self.context = ''
+        elif key.startswith('configure') and not key.endswith(' info'):
+            self.context = key
+        output = self.device.lookup(line, self.context)
+        delay = self.device.latency + random.uniform(0, self.device.jitter)
+        if delay:
+            time.sleep(delay)
+        if not output:
+            return 0
+        lines = output.split('\n')
+        if self.more and self.device.page_lines:
+            return self.paged(lines)
+        return self.send('\r\n'.join(lines) + '\r\n')
+
+    def paged(self, lines):
+        sent = 0
+        page = self.device.page_lines
+        for start in range(0, len(lines), page):
+            sent += self.send('\r\n'.join(lines[start:start + page]) + '\r\n')
+            if start + page < len(lines):
+                sent += self.send(PAGE_PROMPT)
+                key = self.channel.recv(1)
+                sent += self.send('\r' + ' ' * len(PAGE_PROMPT) + '\r')
+                if not key or key.lower() == b'q':
+                    break
+        return sent
+
+
+SEPARATOR = '=' * 79
+RULE = '-' * 79
+
+
+def _peer_ip(i):
+    return '10.{}.{}.{}'.format(i // 65536, (i // 256) % 256, i % 256)
+
+
+def synthetic_interfaces(count):
+    lines = [SEPARATOR, 'Interface Table (Router: Base)', SEPARATOR,
+             'Interface-Name                   Adm       Opr(v4/v6)  Mode    Port/SapId',
+             '   IP-Address                                                  PfxState', RULE]
+    for i in range(count):
+        port = '{}/{}/{}'.format(i // 1000 + 1, i // 100 % 10 + 1, i % 100 + 1)
+        lines.append('{:<32} {:<9} {:<11} {:<7} {}'.format('to-{}'.format(i), 'Up', 'Up/Down', 'Network', port))
+        lines.append('   {}/31                                                 n/a'.format(_peer_ip(i * 2)))
+    lines += [RULE, 'Interfaces : {}'.format(count), SEPARATOR]
+    return '\n'.join(lines)
+
+
+def synthetic_arp(count):
+    lines = [SEPARATOR, 'ARP Table (Router: Base)', SEPARATOR,
+             'IP Address      MAC Address       Expiry    Type   Interface', RULE]
+    for i in range(count):
+        lines.append('{:<15} 00:00:{:02x}:{:02x}:{:02x}:{:02x} 03h59m00s Dyn[I] to-{}'.format(
+            _peer_ip(i), (i >> 24) & 255, (i >> 16) & 255, (i >> 8) & 255, i & 255, i % 64))
+    lines += [RULE, 'No. of ARP Entries: {}'.format(count), SEPARATOR]
+    return '\n'.join(lines)
+
+
+def synthetic_bgp(peers, groups=4, vrf=''):
+    """Transcript entries for the BGP summary, neighbor, group, detail and configure outputs."""
+    show = normalize('show router {}'.format(vrf))
+    configure = 'configure service vprn {}'.format(vrf) if vrf else 'configure router'
+    summary = [SEPARATOR, ' BGP Router ID:1.1.1.17         AS:100         Local AS:100', SEPARATOR,
+               'BGP Summary', SEPARATOR, 'Neighbor', 'Description',
+               '                   AS PktRcvd InQ  Up/Down   State|Rcv/Act/Sent (Addr Family)',
+               '                      PktSent OutQ', RULE]
+    neighbor = [SEPARATOR, 'BGP Neighbor', SEPARATOR]
+    transcript = {}
+    for i in range(peers):
+        peer = _peer_ip(i + 1)
+        group = 'group-{}'.format(i % groups)
+        established = i % 10 != 9
+        summary.append(peer)
+        if established:
+            summary.append('                 {:>5} {:>7}    0 12d13h07m {}/{}/59 (VpnIPv4)'.format(
+                65000 + i, 60672, i, i))
+            summary.append('                       {:>7}    0           3/3/1 (IPv4)'.format(36490))
+        else:
+            summary.append('                 {:>5}       0    0 01h02m03s Active'.format(65000 + i))
+            summary.append('                             0    0')
+        fields = [
+            'Peer AS              : {:<16} Peer Port            : 179'.format(65000 + i),
+            'Peer Address         : {}'.format(peer),
+            'Local AS             : 100              Local Port           : {}'.format(50000 + i),
+            'Local Address        : 1.1.1.17',
+            'State                : {:<16} Last State           : Active'.format(
+                'Established' if established else 'Active'),
+            'Last Event           : recvKeepAlive',
+            'Hold Time            : 90               Keep Alive           : 30',
+            'Cluster Id           : None',
+            'Import Policy        : import-{}'.format(i),
+            'Export Policy        : export-{}'.format(i)]
+        header = [RULE, 'Peer                 : {}'.format(peer), 'Description          : peer {}'.format(i),
+                  'Group                : {}'.format(group), RULE]
+        neighbor += header + fields
+        transcript['{} bgp neighbor {} detail'.format(show, peer)] = '\n'.join(
+            [SEPARATOR, 'BGP Neighbor', SEPARATOR] + header + fields + [
+                'Multihop             : 0 (Default)',
+                'Remove Private       : Disabled',
+                'Local AddPath Capabi*: Disabled',
+                'i/p Messages         : {:<16} o/p Messages         : {}'.format(60000 + i, 36000 + i),
+                'i/p Updates          : {:<16} o/p Updates          : {}'.format(i, 2 * i),
+                'Output Queue         : 0',
+                'Num of Update Flaps  : {}'.format(i % 7),
+                'IPv4 Recd. Prefixes  : {:<16} IPv4 Active Prefixes : {}'.format(i, i),
+                'IPv4 Suppressed Pfxs : 0',
+                'VPN-IPv4 Suppr. Pfxs : 0                VPN-IPv4 Recd. Pfxs  : {}'.format(i),
+                'VPN-IPv4 Active Pfxs : {}'.format(i), SEPARATOR])
+        transcript['{} bgp group {} neighbor {} info'.format(configure, group, peer)] = '\n'.join([
+            '-' * 50,
+            '                    description "peer {}"'.format(i),
+            '                    import "import-{}"'.format(i),
+            '                    export "export-{}"'.format(i),
+            '                    peer-as {}'.format(65000 + i),
+            '-' * 50])
+    summary.append(RULE)
+    neighbor.append(SEPARATOR)
+    group_lines = [SEPARATOR, 'BGP Group', SEPARATOR]
+    for g in range(groups):
+        group_lines += [RULE, 'Group            : group-{}'.format(g), RULE,
+                        'Group Type           : No Type          State                : Up',
+                        'Peer AS              : n/a              Local AS             : 100',
+                        'Local Address        : n/a',
+                        'Multihop             : 0',
+                        'Multipath            : 2',
+                        'Remove Private       : Disabled',
+                        'Description          : group {}'.format(g),
+                        'Import Policy        : None Specified / Inherited',
+                        'Export Policy        : None Specified / Inherited']
+    group_lines.append(SEPARATOR)
+    transcript['{} bgp summary'.format(show)] = '\n'.join(summary)
+    transcript['{} bgp neighbor'.format(show)] = '\n'.join(neighbor)
+    transcript['{} bgp group'.format(show)] = '\n'.join(group_lines)
+    return transcript
+
+
+def synthetic_rollback(checkpoints=3, changes=10):
+    """Transcript entries for `admin rollback view` and a compare of every checkpoint with `changes` hunks."""
+    ids = ['latest'] + [str(i) for i in range(1, checkpoints)]
+    view = [SEPARATOR, 'Rollback Information', SEPARATOR,
+            'Rollback Location            : cf3:/rollback/rb',
+            'Max Local  Rollback Files    : 10', RULE, 'Rollback Files', RULE,
+            'Idx    Suffix     Comment', '       Date       Time', RULE]
+    for i, checkpoint in enumerate(ids):
+        suffix = '.rb' + ('.{}'.format(i) if i else '')
+        view += ['{:<6} {:<10} {}'.format(checkpoint, suffix, 'checkpoint {}'.format(i)),
+                 '       2016/06/{:02d} 10:43:{:02d} UTC'.format(10 - i, i)]
+    view += [RULE]
+    compare = ['Processing current config... 0.220 s', 'Processing "cf3:/rollback/rb"... 0.200 s',
+               '    configure', '        router Base']
+    for i in range(changes):
+        compare += ['            interface "to-{}"'.format(i),
+                    '-               address {}/31'.format(_peer_ip(i * 2)),
+                    '+               address {}/31'.format(_peer_ip(i * 2 + 1)),
+                    '+               description "changed {}"'.format(i),
+                    '            exit']
+    compare += ['        exit', '    exit', 'Finished in 0.010 s']
+    compare = '\n'.join(compare)
+    transcript = {'admin rollback view': '\n'.join(view)}
+    for checkpoint in ids:
+        transcript['admin rollback compare {} to active-cfg'.format(checkpoint)] = compare
+    return transcript
+
+
+def synthetic_services(vrfs):
+    lines = [SEPARATOR, 'Services [vprn]', SEPARATOR,
+             'ServiceId    Type      Adm  Opr  CustomerId Service Name', RULE]
+    for vrf in vrfs:
+        lines.append('{:<12} VPRN      Up   Up   1'.format(vrf))
+    lines += [RULE, 'Matching Services : {}'.format(len(vrfs)), RULE]
+    return '\n'.join(lines)
+
+
+def _config_bgp(peers, groups, indent):
+    lines = [indent + 'bgp', indent + '    multipath 2']
+    for g in range(groups):
+        lines += [indent + '    group "group-{}"'.format(g), indent + '        description "group {}"'.format(g)]
+        for i in range(g, peers, groups):
+            lines += [indent + '        neighbor {}'.format(_peer_ip(i + 1)),
+                      indent + '            description "peer {}"'.format(i),
+                      indent + '            import "import-{}"'.format(i),
+                      indent + '            export "export-{}"'.format(i),
+                      indent + '            peer-as {}'.format(65000 + i),
+                      indent + '        exit']
+        lines.append(indent + '    exit')
+    return lines + [indent + '    no shutdown', indent + 'exit']
+
+
+def synthetic_config(interfaces, peers, groups=4, vrfs=(), vrf_peers=0):
+    """`admin display-config` output matching the synthetic interfaces, BGP peers and VPRNs."""
+    lines = ['# TiMOS-B-14.0.R4 both/hops Nokia 7750 SR Copyright (c) 2000-2016 Nokia.',
+             'exit all', 'configure', '#' + '-' * 50, 'echo "Router (1st pass) Configuration"',
+             '#' + '-' * 50, '    router Base']
+    for i in range(interfaces):
+        lines += ['        interface "to-{}"'.format(i),
+                  '            address {}/31'.format(_peer_ip(i * 2)),
+                  '            port {}/{}/{}'.format(i // 1000 + 1, i // 100 % 10 + 1, i % 100 + 1),
+                  '            no shutdown', '        exit']
+    lines += ['        autonomous-system 100', '    exit']
+    if vrfs:
+        lines += ['#' + '-' * 50, 'echo "Service Configuration"', '#' + '-' * 50, '    service']
+        for vrf in vrfs:
+            lines += ['        vprn {} customer 1 create'.format(vrf), '            autonomous-system 100']
+            lines += _config_bgp(vrf_peers, groups, ' ' * 12)
+            lines += ['            no shutdown', '        exit']
+        lines.append('    exit')
+    lines += ['#' + '-' * 50, 'echo "BGP Configuration"', '#' + '-' * 50, '    router Base']
+    lines += _config_bgp(peers, groups, ' ' * 8)
+    lines += ['    exit', 'exit all']
+    return '\n'.join(lines)
+
+
+def synthetic_transcript(interfaces=10, arp_entries=100, bgp_peers=10, hostname='SR-A', vrfs=0, vrf_peers=4,
+                         rollback_changes=10):
+    """A transcript answering every getter, sized by the given table lengths.
+
+    `vrfs` adds that many VPRN services (ids 100, 101, ...) with `vrf_peers`
+    BGP peers each; rollback compares report `rollback_changes` hunks.
+    """
+    vrf_ids = [str(100 + i) for i in range(vrfs)]
+    transcript = {
+        'show system information': '\n'.join([
+            SEPARATOR, 'System Information', SEPARATOR,
+            'System Name            : {}'.format(hostname),
+            'System Type            : 7750 SR-12',
+            'System Version         : B-14.0.R4',
+            'System Contact         : ',
+            'System Up Time         : 13 days, 00:08:16.79 (hr:min:sec)', SEPARATOR]),
+        'show chassis': '\n'.join([
+            SEPARATOR, 'Chassis Information', SEPARATOR,
+            '  Name                              : {}'.format(hostname),
+            '  Type                              : 7750 SR-12', SEPARATOR]),
+        'show chassis detail': '\n'.join([
+            SEPARATOR, 'Chassis Information', SEPARATOR,
+            '  Serial number                     : NS0000000001', SEPARATOR]),
+        'show router interface exclude-services': synthetic_interfaces(interfaces),
+        'show router arp': synthetic_arp(arp_entries),
+        'admin display-config': synthetic_config(interfaces, bgp_peers, vrfs=vrf_ids, vrf_peers=vrf_peers),
+        'show service service-using vprn': synthetic_services(vrf_ids),
+    }
+    transcript.update(synthetic_bgp(bgp_peers))
+    transcript.update(synthetic_rollback(changes=rollback_changes))
+    for vrf in vrf_ids:
+        transcript.update(synthetic_bgp(vrf_peers, vrf=vrf))
+    return transcript
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+import threading
+import time
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from SROSDriver import SROSDriver, file_md5
+
+DeviceResult = namedtuple('DeviceResult', ['hostname', 'results', 'errors', 'timings'])
+TransferResult = namedtuple('TransferResult', ['hostname', 'status', 'bytes', 'duration', 'throughput', 'error'])
+
+
+class SROSFleet(object):
+    """Run SROSDriver getters across an inventory of devices with a bounded worker pool.
+
+    `inventory` is a list of dicts with `hostname`, `username`, `password` and
+    optionally `timeout` and `optional_args`, i.e. the SROSDriver arguments.
+    """
+
+    def __init__(self, inventory, workers=20, per_device_limit=1, driver=SROSDriver):
+        self.inventory = inventory
+        self.workers = workers
+        self.per_device_limit = per_device_limit
+        self.driver = driver
+        self._device_slots = {}
+        self._slots_lock = threading.Lock()
+
+    def run(self, getters):
+        """Yield one DeviceResult per device as soon as that device is done.
+
+        `getters` are getter names, or (name, kwargs) tuples such as
+        ('get_bgp_neighbors', {'vrf': '100'}). A failing getter is recorded in
+        `errors` and does not stop the remaining getters or devices.
+        """
+        return self._run_all(self._collect, getters)
+
+    def distribute(self, source_file, dest_file):
+        """Copy one local file to every device, at most `workers` at a time, yielding a TransferResult each.
+
+        Devices already holding the same file (size and MD5) are skipped.
+        `status` is 'copied', 'skipped', 'no_space' or 'failed' (see `error`);
+        `throughput` is in bytes per second.
+        """
+        md5 = file_md5(source_file)
+        return self._run_all(self._transfer, source_file, dest_file, md5)
+
+    def _run_all(self, task, *args):
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        futures = [executor.submit(task, device, *args) for device in self.inventory]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def _device_slot(self, hostname):
+        with self._slots_lock:
+            if hostname not in self._device_slots:
+                self._device_slots[hostname] = threading.BoundedSemaphore(self.per_device_limit)
+            return self._device_slots[hostname]
+
+    def _collect(self, device, getters):
+        hostname = device['hostname']
+        results = {}
+        errors = {}
+        timings = {}
+        with self._device_slot(hostname):
+            start = time.time()
+            conn = self.driver(hostname, device['username'], device['password'],
+                               timeout=device.get('timeout', 60),
+                               optional_args=device.get('optional_args'))
+            try:
+                conn.open()
+            except Exception as e:
+                errors['open'] = e
+            else:
+                timings['open'] = time.time() - start
+                for getter in getters:
+                    name, kwargs = getter if isinstance(getter, tuple) else (getter, {})
+                    getter_start = time.time()
+                    try:
+                        results[name] = getattr(conn, name)(**kwargs)
+                    except Exception as e:
+                        errors[name] = e
+                    timings[name] = time.time() - getter_start
+            finally:
+                conn.close()
+            timings['total'] = time.time() - start
+        return DeviceResult(hostname, results, errors, timings)
+
+    def _transfer(self, device, source_file, dest_file, md5):
+        hostname = device['hostname']
+        with self._device_slot(hostname):
+            start = time.time()
+            conn = self.driver(hostname, device['username'], device['password'],
+                               timeout=device.get('timeout', 60),
+                               optional_args=device.get('optional_args'))
+            try:
+                conn.open()
+                result = conn.put_file(source_file, dest_file, md5)
+            except Exception as e:
+                return TransferResult(hostname, 'failed', 0, time.time() - start, 0.0, e)
+            finally:
+                conn.close()
+            return TransferResult(hostname, result['status'], result['bytes'], result['duration'],
+                                  result['throughput'], None)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""Listeners for SROSDriver instrumentation events.
+
+Pass one or more listeners with optional_args['instrumentation']. Each event is
+a dict with `event`, `hostname`, `getter` and `time`, plus:
+
+    connect  - duration, reused (transport taken from a connection pool)
+    command  - command, lines, bytes, duration (write until the last prompt)
+    parse    - parser, duration (CPU time of the parsing thread), wall
+    getter   - duration
+    snapshot_error - snapshot, error (the getter result could not be stored; the getter still returns it)
+"""
+
+import json
+import re
+import threading
+
+IP_RE = re.compile(r'\d+\.\d+\.\d+\.\d+')
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def command_label(command):
+    """First line of a command with addresses replaced, to keep per-peer commands in one series."""
+    return IP_RE.sub('X', command.split('\n', 1)[0])
+
+
+class Histogram(object):
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+
+
+class HistogramCollector(object):
+    """In-memory latency histograms and byte/round-trip counters built from driver events.
+
+    Series are keyed by metric name and labels (hostname, getter, command or
+    parser), so one collector can be shared by a whole fleet.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        labels = (('hostname', event['hostname']), ('getter', event['getter'] or ''))
+        kind = event['event']
+        if kind == 'connect':
+            self.observe('sros_connect_seconds', labels[:1], event['duration'])
+        elif kind == 'command':
+            labels += (('command', command_label(event['command'])),)
+            self.observe('sros_command_seconds', labels, event['duration'])
+            self.increment('sros_command_bytes_total', labels, event['bytes'])
+            self.increment('sros_command_round_trips_total', labels, 1)
+        elif kind == 'parse':
+            self.observe('sros_parse_seconds', labels + (('parser', event['parser']),), event['duration'])
+        elif kind == 'getter':
+            self.observe('sros_getter_seconds', labels, event['duration'])
+
+    def observe(self, metric, labels, value):
+        with self._lock:
+            key = (metric, labels)
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(self.buckets)
+            self.histograms[key].observe(value)
+
+    def increment(self, metric, labels, value):
+        with self._lock:
+            key = (metric, labels)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def slowest(self, metric, label, limit=10):
+        """Return (label value, total seconds, count) for the `limit` largest totals of `metric` by `label`."""
+        totals = {}
+        with self._lock:
+            for (name, labels), histogram in self.histograms.items():
+                if name != metric:
+                    continue
+                value = dict(labels).get(label)
+                total, count = totals.get(value, (0.0, 0))
+                totals[value] = (total + histogram.sum, count + histogram.count)
+        ranked = sorted(totals.items(), key=lambda item: item[1][0], reverse=True)
+        return [(value, total, count) for value, (total, count) in ranked[:limit]]
+
+    def prometheus_text(self):
+        """Render every series in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+        for metric in sorted(set(name for (name, _), _ in histograms)):
+            lines.append('# TYPE {} histogram'.format(metric))
+            for (name, labels), histogram in histograms:
+                if name != metric:
+                    continue
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    lines.append('{}_bucket{} {}'.format(metric, _labels(labels + (('le', str(bound)),)), cumulative))
+                lines.append('{}_sum{} {}'.format(metric, _labels(labels), histogram.sum))
+                lines.append('{}_count{} {}'.format(metric, _labels(labels), histogram.count))
+        for metric in sorted(set(name for (name, _), _ in counters)):
+            lines.append('# TYPE {} counter'.format(metric))
+            for (name, labels), value in counters:
+                if name == metric:
+                    lines.append('{}{} {}'.format(metric, _labels(labels), value))
+        return '\n'.join(lines) + '\n'
+
+
+class JSONLinesExporter(object):
+    """Write every event as one JSON object per line to a file-like `stream`."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        line = json.dumps(event, sort_keys=True)
+        with self._lock:
+            self.stream.write(line + '\n')
+
+
+def _labels(labels):
+    return '{' + ','.join('{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                          for name, value in labels) + '}'
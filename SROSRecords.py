@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+"""Compact result types for the bulk getters.
+
+With optional_args['result_format'] set to 'records', get_arp_table(),
+get_interfaces(), get_bgp_neighbors() and get_bgp_config_detail() return lists
+of the namedtuples below instead of dicts; with 'columns' they return a
+ColumnTable holding one list (or int array) per field. `to_napalm()` turns
+either form back into the usual NAPALM dict shape. rollback_view() and
+rollback_compare() return RollbackEntry and ConfigHunk rows the same way.
+"""
+
+from array import array
+from collections import namedtuple
+
+try:
+    array('q')
+    INT_TYPECODE = 'q'
+except ValueError:
+    INT_TYPECODE = 'l'
+
+
+class ArpEntry(namedtuple('ArpEntry', ['mac', 'ip', 'interface', 'age'])):
+    __slots__ = ()
+    int_fields = ('age',)
+
+    @staticmethod
+    def to_napalm(rows):
+        return [dict(zip(row._fields, row)) for row in rows]
+
+
+class Interface(namedtuple('Interface', ['name', 'admin_status', 'ipv4_status', 'ipv6_status',
+                                         'mode', 'ip', 'link_to'])):
+    __slots__ = ()
+    int_fields = ()
+
+    @staticmethod
+    def to_napalm(rows):
+        return dict((row.name, dict(zip(row._fields[1:], row[1:]))) for row in rows)
+
+
+class AddressFamily(namedtuple('AddressFamily', ['family', 'received_prefixes', 'accepted_prefixes',
+                                                 'sent_prefixes'])):
+    __slots__ = ()
+
+
+class BgpNeighbor(namedtuple('BgpNeighbor', ['vrf', 'peer', 'local_as', 'remote_as', 'router_id', 'uptime',
+                                             'remote_id', 'is_enabled', 'bgp_state', 'is_up',
+                                             'address_family'])):
+    """One row of get_bgp_neighbors(); `address_family` is a tuple of AddressFamily."""
+    __slots__ = ()
+    int_fields = ('local_as', 'remote_as')
+
+    @staticmethod
+    def to_napalm(rows, vrf=None, vrfs=()):
+        neighbors = dict((name, {}) for name in ([vrf] if vrf else vrfs))
+        for row in rows:
+            peer = dict(zip(row._fields[2:], row[2:]))
+            peer['address_family'] = dict(
+                (family.family, dict(zip(family._fields[1:], family[1:]))) for family in row.address_family)
+            neighbors.setdefault(row.vrf, {})[row.peer] = peer
+        return neighbors
+
+
+class BgpNeighborDetail(namedtuple('BgpNeighborDetail', [
+        'peer', 'is_up', 'local_as', 'remote_as', 'router_id', 'local_address', 'remote_add', 'loc_port',
+        'multihop', 'multipath', 'remove_private_as', 'import_policy', 'export_policy', 'input_messages',
+        'output_messages', 'input_updates', 'output_updates', 'messages_queued_out', 'connection_state',
+        'previous_connection_state', 'last_event', 'holdtime', 'keepalive', 'active_prefix_count',
+        'active_pfx_vpn_ipv4_count', 'receive_prefix_count', 'receive_pfx_vpn_ipv4_count',
+        'suppressed_prefix_count', 'suppressed_pfx_count_vpn_ipv4', 'flap_count'])):
+    """One row of get_bgp_config_detail(); policies are a list of names or False."""
+    __slots__ = ()
+    int_fields = ('local_as', 'remote_as', 'loc_port', 'input_messages', 'output_messages', 'input_updates',
+                  'output_updates', 'messages_queued_out', 'holdtime', 'keepalive', 'active_prefix_count',
+                  'active_pfx_vpn_ipv4_count', 'receive_prefix_count', 'receive_pfx_vpn_ipv4_count',
+                  'suppressed_prefix_count', 'suppressed_pfx_count_vpn_ipv4', 'flap_count')
+
+    @staticmethod
+    def to_napalm(rows):
+        return dict((row.peer, dict(zip(row._fields[1:], row[1:]))) for row in rows)
+
+
+class RollbackEntry(namedtuple('RollbackEntry', ['id', 'suffix', 'timestamp', 'comment'])):
+    """One checkpoint of rollback_view(); `id` is 'latest', 'rescue' or the index as a string."""
+    __slots__ = ()
+    int_fields = ()
+
+    @staticmethod
+    def to_napalm(rows):
+        return [dict(zip(row._fields, row)) for row in rows]
+
+
+class ConfigHunk(namedtuple('ConfigHunk', ['path', 'removed', 'added'])):
+    """Consecutive removed and added lines of rollback_compare() below the context lines in `path`."""
+    __slots__ = ()
+    int_fields = ()
+
+    @staticmethod
+    def to_napalm(rows):
+        return [{'path': list(row.path), 'removed': list(row.removed), 'added': list(row.added)} for row in rows]
+
+
+class ColumnTable(object):
+    """Rows of one record type stored column-wise: an int array per int field, a list per other field."""
+
+    __slots__ = ('record', 'columns')
+
+    def __init__(self, record, rows=()):
+        self.record = record
+        self.columns = [array(INT_TYPECODE) if name in record.int_fields else []
+                        for name in record._fields]
+        for row in rows:
+            self.append(row)
+
+    def append(self, row):
+        for column, value in zip(self.columns, row):
+            column.append(value)
+
+    def column(self, name):
+        return self.columns[self.record._fields.index(name)]
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def __iter__(self):
+        record = self.record
+        for values in zip(*self.columns):
+            yield record._make(values)
+
+    def __getitem__(self, index):
+        return self.record._make(column[index] for column in self.columns)
+
+    def to_napalm(self, **kwargs):
+        return self.record.to_napalm(iter(self), **kwargs)
+
+
+RESULT_FORMATS = ('dict', 'records', 'columns')
+
+
+def shape(record, rows, result_format='dict', **kwargs):
+    """Return `rows` of `record` in `result_format`; kwargs go to the record's to_napalm()."""
+    if result_format == 'records':
+        return list(rows)
+    if result_format == 'columns':
+        return ColumnTable(record, rows)
+    return record.to_napalm(rows, **kwargs)
+
+
+def to_napalm(result, record=None, **kwargs):
+    """Convert a 'records' or 'columns' result to the NAPALM dict shape.
+
+    `record` is only needed for an empty list of records, whose type cannot be
+    told from its content. In a dict result (vrf='all', delta getters) each
+    value is converted; NAPALM dict values are returned unchanged.
+    """
+    if isinstance(result, dict):
+        return dict((key, to_napalm(value, record, **kwargs) if isinstance(value, (list, ColumnTable)) else value)
+                    for key, value in result.items())
+    if isinstance(result, ColumnTable):
+        return result.to_napalm(**kwargs)
+    if record is None and isinstance(result, list) and result:
+        record = type(result[0])
+    if record is None or not hasattr(record, 'to_napalm'):
+        return result
+    return record.to_napalm(result, **kwargs)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+"""Append-only on-disk store of getter results, one pair of files per device and getter.
+
+    <path>/<hostname>/<getter>.dat  records: timestamp (float64), length (uint32), zlib-compressed JSON
+    <path>/<hostname>/<getter>.idx  entries: timestamp (float64), offset of the record in .dat (uint64)
+
+Index entries are fixed width and timestamps only grow, so a point query is
+a binary search over the memory-mapped index followed by one record read
+from the memory-mapped data file; nothing else of either file is loaded.
+A record written without its index entry (e.g. on a crash) is never read.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+from collections import namedtuple
+
+try:
+    from urllib import quote, unquote
+except ImportError:
+    from urllib.parse import quote, unquote
+
+RECORD = struct.Struct('<dI')
+INDEX = struct.Struct('<dQ')
+
+Snapshot = namedtuple('Snapshot', ['hostname', 'getter', 'timestamp', 'result'])
+
+
+def snapshot_key(getter, args=(), kwargs=None):
+    """Name a getter call is stored under, e.g. 'get_facts' or 'get_bgp_neighbors(vrf=all)'."""
+    params = [str(arg) for arg in args] + ['{}={}'.format(k, v) for k, v in sorted((kwargs or {}).items())]
+    return '{}({})'.format(getter, ','.join(params)) if params else getter
+
+
+class SnapshotStore(object):
+    """Persist getter results by device and time; pass one as optional_args['snapshot_store'].
+
+    Results are stored in the NAPALM dict shape, so they have to be JSON
+    serializable. `compress_level` is the zlib level of every record.
+    """
+
+    def __init__(self, path, compress_level=1):
+        self.path = path
+        self.compress_level = compress_level
+        self._lock = threading.Lock()
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def append(self, hostname, getter, result, timestamp=None):
+        """Store `result` of `getter` for `hostname` at `timestamp` (default now); returns the timestamp."""
+        payload = json.dumps(result, separators=(',', ':'))
+        if not isinstance(payload, bytes):
+            payload = payload.encode('utf-8')
+        payload = zlib.compress(payload, self.compress_level)
+        data_path, index_path = self._paths(hostname, getter)
+        with self._lock:
+            # taken under the lock, so concurrent appends of one getter stay in timestamp order
+            timestamp = time.time() if timestamp is None else timestamp
+            directory = os.path.dirname(data_path)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            size = os.path.getsize(index_path) if os.path.exists(index_path) else 0
+            entries = size // INDEX.size
+            if entries and self._index_at(index_path, entries - 1)[0] > timestamp:
+                raise ValueError('{} {}: snapshot at {} is older than the last one'.format(
+                    hostname, getter, timestamp))
+            offset = os.path.getsize(data_path) if os.path.exists(data_path) else 0
+            with open(data_path, 'ab') as data:
+                data.write(RECORD.pack(timestamp, len(payload)) + payload)
+            with open(index_path, 'ab') as index:
+                if size % INDEX.size:
+                    # drop an entry left half written
+                    index.truncate(entries * INDEX.size)
+                index.write(INDEX.pack(timestamp, offset))
+        return timestamp
+
+    def at(self, hostname, getter, timestamp):
+        """The last Snapshot of `getter` for `hostname` taken at or before `timestamp`, or None."""
+        with self._open(hostname, getter) as files:
+            if files is None:
+                return None
+            data, index = files
+            position = self._bisect(index, timestamp) - 1
+            if position < 0:
+                return None
+            return self._read(hostname, getter, data, index, position)
+
+    def range(self, hostname, getter, start=None, end=None):
+        """Yield the Snapshots of `getter` for `hostname` taken from `start` up to and including `end`."""
+        with self._open(hostname, getter) as files:
+            if files is None:
+                return
+            data, index = files
+            position = 0 if start is None else self._bisect(index, start, left=True)
+            while position < len(index) // INDEX.size:
+                snapshot = self._read(hostname, getter, data, index, position)
+                if end is not None and snapshot.timestamp > end:
+                    return
+                yield snapshot
+                position += 1
+
+    def fleet_at(self, getter, timestamp, hostnames=None):
+        """{hostname: Snapshot} of `getter` at `timestamp` for every stored device (or `hostnames`)."""
+        snapshots = {}
+        for hostname in self.devices() if hostnames is None else hostnames:
+            snapshot = self.at(hostname, getter, timestamp)
+            if snapshot is not None:
+                snapshots[hostname] = snapshot
+        return snapshots
+
+    def timestamps(self, hostname, getter):
+        with self._open(hostname, getter) as files:
+            if files is None:
+                return []
+            index = files[1]
+            return [INDEX.unpack_from(index, i * INDEX.size)[0] for i in range(len(index) // INDEX.size)]
+
+    def devices(self):
+        return sorted(unquote(name) for name in os.listdir(self.path)
+                      if os.path.isdir(os.path.join(self.path, name)))
+
+    def getters(self, hostname):
+        directory = os.path.join(self.path, quote(hostname, safe=''))
+        if not os.path.isdir(directory):
+            return []
+        return sorted(unquote(name[:-len('.idx')]) for name in os.listdir(directory) if name.endswith('.idx'))
+
+    def _paths(self, hostname, getter):
+        base = os.path.join(self.path, quote(hostname, safe=''), quote(getter, safe=''))
+        return base + '.dat', base + '.idx'
+
+    def _index_at(self, index_path, position):
+        with open(index_path, 'rb') as index:
+            index.seek(position * INDEX.size)
+            return INDEX.unpack(index.read(INDEX.size))
+
+    def _open(self, hostname, getter):
+        return _MappedFiles(*self._paths(hostname, getter))
+
+    def _bisect(self, index, timestamp, left=False):
+        """Number of index entries taken before `timestamp` (`left`) or at or before it."""
+        low, high = 0, len(index) // INDEX.size
+        while low < high:
+            middle = (low + high) // 2
+            value = INDEX.unpack_from(index, middle * INDEX.size)[0]
+            if value < timestamp or (not left and value == timestamp):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _read(self, hostname, getter, data, index, position):
+        timestamp, offset = INDEX.unpack_from(index, position * INDEX.size)
+        length = RECORD.unpack_from(data, offset)[1]
+        start = offset + RECORD.size
+        payload = zlib.decompress(data[start:start + length])
+        return Snapshot(hostname, getter, timestamp, json.loads(payload.decode('utf-8')))
+
+
+class _MappedFiles(object):
+    """Context manager mapping the data and index files read-only; None when nothing is stored yet."""
+
+    def __init__(self, data_path, index_path):
+        self.paths = (data_path, index_path)
+        self.files = []
+        self.maps = []
+
+    def __enter__(self):
+        for path in self.paths:
+            if not os.path.exists(path) or not os.path.getsize(path):
+                self.__exit__()
+                return None
+            handle = open(path, 'rb')
+            self.files.append(handle)
+            self.maps.append(mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ))
+        return tuple(self.maps)
+
+    def __exit__(self, *exc):
+        for mapped in self.maps:
+            mapped.close()
+        for handle in self.files:
+            handle.close()
+        self.maps, self.files = [], []
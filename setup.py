@@ -8,7 +8,8 @@ from pip.req import parse_requirements
 __author__ = 'Michal Spiez <mspiez@gmail.com>'
 
 install_reqs = parse_requirements('requirements.txt', session=uuid.uuid1())
-reqs = [str(ir.req) for ir in install_reqs]
+# str(ir.req) drops environment markers; conditional requirements are declared in extras_require instead
+reqs = [str(ir.req) for ir in install_reqs if not ir.markers]
 
 setup(
     name="napalm-sros",
@@ -26,4 +27,8 @@ setup(
     url="https://github.com/mspiez/napalm-sros",
     include_package_data=True,
     install_requires=reqs,
+    extras_require={
+        ':python_version<"3.0"': ['futures'],
+        'async:python_version>="3.6"': ['asyncssh'],
+    },
 )
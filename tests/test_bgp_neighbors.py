@@ -0,0 +1,26 @@
+"""get_bgp_neighbors() joins neighbor and group data in memory instead of asking per peer."""
+
+from SROSDriver import SROSDriver
+from SROSFakeDevice import SROSFakeDevice, synthetic_transcript
+
+
+def neighbor_commands(peers):
+    """The neighbors found and the CLI lines sent by one get_bgp_neighbors() on a device with `peers` peers."""
+    with SROSFakeDevice(synthetic_transcript(interfaces=2, arp_entries=2, bgp_peers=peers)) as fake:
+        driver = SROSDriver('127.0.0.1', 'admin', 'admin', optional_args={'port': fake.port})
+        driver.open()
+        try:
+            sent = len(fake.commands)
+            neighbors = driver.get_bgp_neighbors()
+            return neighbors, fake.commands[sent:]
+        finally:
+            driver.close()
+
+
+def test_command_count_does_not_depend_on_peers():
+    few, few_commands = neighbor_commands(3)
+    many, many_commands = neighbor_commands(60)
+    assert len(few['global']) == 3
+    assert len(many['global']) == 60
+    assert few_commands == many_commands
+    assert len(many_commands) == 2
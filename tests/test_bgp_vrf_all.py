@@ -0,0 +1,60 @@
+"""vrf='all' reads every VPRN in batched exchanges, not one round trip per VPRN."""
+
+import pytest
+
+from SROSDriver import SROSDriver
+from SROSFakeDevice import SROSFakeDevice, synthetic_transcript
+
+GLOBAL_PEERS = 4
+VRF_PEERS = 2
+
+
+def batches(count, batch_size):
+    return -(-count // batch_size)
+
+
+def run_all(fake, getter):
+    """Result of `getter(vrf='all')`, the CLI lines the device received and the number of exchanges."""
+    exchanges = []
+    driver = SROSDriver('127.0.0.1', 'admin', 'admin', optional_args={
+        'port': fake.port, 'instrumentation': [lambda event: exchanges.append(event['event'] == 'command')]})
+    driver.open()
+    try:
+        sent = len(fake.commands)
+        del exchanges[:]
+        result = getattr(driver, getter)(vrf='all')
+        return result, fake.commands[sent:], sum(exchanges), driver.batch_size
+    finally:
+        driver.close()
+
+
+@pytest.fixture(scope='module', params=[1, 10, 50])
+def device(request):
+    transcript = synthetic_transcript(interfaces=2, arp_entries=2, bgp_peers=GLOBAL_PEERS, vrfs=request.param,
+                                      vrf_peers=VRF_PEERS)
+    with SROSFakeDevice(transcript) as fake:
+        yield request.param, fake
+
+
+@pytest.mark.parametrize('getter, per_vrf', [('get_bgp_neighbors', ['bgp summary', 'bgp neighbor']),
+                                             ('get_bgp_config', ['bgp neighbor', 'bgp group'])])
+def test_show_commands_are_batched(device, getter, per_vrf):
+    vrfs, fake = device
+    result, commands, exchanges, batch_size = run_all(fake, getter)
+    assert len(result) == vrfs + 1
+    assert commands[0] == '/show service service-using vprn'
+    for command in per_vrf:
+        assert sum(command in line for line in commands) == vrfs + 1
+    assert len(commands) == 1 + len(per_vrf) * (vrfs + 1)
+    assert exchanges == 1 + batches(len(per_vrf) * (vrfs + 1), batch_size)
+
+
+def test_detail_is_batched(device):
+    vrfs, fake = device
+    peers = GLOBAL_PEERS + vrfs * VRF_PEERS
+    result, commands, exchanges, batch_size = run_all(fake, 'get_bgp_config_detail')
+    assert sum(len(rows) for rows in result.values()) == peers
+    assert sum(line.endswith('bgp summary') for line in commands) == vrfs + 1
+    assert sum(line.endswith(' detail') for line in commands) == peers
+    assert exchanges == (1 + batches(vrfs + 1, batch_size) + batches(peers, batch_size) +
+                         batches(peers, batch_size))
@@ -0,0 +1,98 @@
+"""The optional_args['cache_ttl'] cache: hits, TTL and LRU eviction, and invalidation by configuration changes."""
+
+import time
+
+import pytest
+
+from SROSDriver import CommandCache, SROSDriver
+from SROSFakeDevice import SROSFakeDevice, synthetic_transcript
+
+INTERFACES_CMD = '/show router interface exclude-services'
+
+
+@pytest.fixture(scope='module')
+def fake():
+    with SROSFakeDevice(synthetic_transcript(interfaces=5, arp_entries=5, bgp_peers=3)) as device:
+        yield device
+
+
+@pytest.fixture
+def driver(fake):
+    driver = SROSDriver('127.0.0.1', 'admin', 'admin', optional_args={'port': fake.port, 'cache_ttl': 60})
+    driver.open()
+    yield driver
+    driver.close()
+
+
+def sent(fake, command):
+    return fake.commands.count(command)
+
+
+def test_repeated_getter_sends_no_command(fake, driver):
+    before = sent(fake, INTERFACES_CMD)
+    first = driver.get_interfaces()
+    assert driver.get_interfaces() == first
+    assert driver.command(INTERFACES_CMD) == driver.command(INTERFACES_CMD)
+    assert sent(fake, INTERFACES_CMD) == before + 1
+    assert driver.cache.hits == 3
+
+
+def test_cached_result_is_a_copy(driver):
+    first = driver.get_interfaces()
+    name = sorted(first)[0]
+    first[name]['admin_status'] = 'changed'
+    del first[sorted(first)[1]]
+    second = driver.get_interfaces()
+    assert second[name]['admin_status'] == 'Up'
+    assert len(second) == 5
+    second.clear()
+    assert len(driver.get_interfaces()) == 5
+
+
+def test_configure_forces_refetch(fake, driver):
+    driver.get_interfaces()
+    driver.get_config_index()
+    before = sent(fake, INTERFACES_CMD)
+    driver.command('/configure router interface "to-0" shutdown')
+    assert driver._config_index is None
+    driver.get_interfaces()
+    assert sent(fake, INTERFACES_CMD) == before + 1
+
+
+def test_configure_info_exit_all_from_the_user_forces_refetch(fake, driver):
+    driver.get_interfaces()
+    before = sent(fake, INTERFACES_CMD)
+    driver.command('/configure router bgp shutdown\ninfo\nexit all')
+    driver.get_interfaces()
+    assert sent(fake, INTERFACES_CMD) == before + 1
+
+
+def test_policy_lookup_keeps_the_cache(fake, driver):
+    driver.get_interfaces()
+    driver.get_config_index()
+    lookups = len([cmd for cmd in fake.commands if cmd.startswith('/configure')])
+    before = sent(fake, INTERFACES_CMD)
+    assert len(driver.get_bgp_config_detail()) == 3
+    assert len([cmd for cmd in fake.commands if cmd.startswith('/configure')]) == lookups + 3
+    assert driver._config_index is not None
+    driver.get_interfaces()
+    assert sent(fake, INTERFACES_CMD) == before
+
+
+def test_ttl_expiry():
+    cache = CommandCache(ttl=0.05)
+    cache.set('key', 'value')
+    assert cache.get('key') == 'value'
+    time.sleep(0.1)
+    assert cache.get('key') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_eviction():
+    cache = CommandCache(ttl=60, max_size=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
@@ -0,0 +1,101 @@
+"""exec_file_report() ends on SR OS's completion message, on the failing line, or on a file it cannot open."""
+
+import asyncio
+import time
+
+import pytest
+
+from AsyncSROSDriver import AsyncSROSDriver
+from SROSDriver import SROSDriver
+from SROSFakeDevice import SROSFakeDevice, synthetic_transcript
+
+IDLE_TIMEOUT = 30
+
+EXEC_OUTPUTS = {
+    'cf3:/ok.cfg': [
+        'A:SR-A# configure router interface "to-0" description "failed links"',
+        'A:SR-A>config>router>if# exit all',
+        'A:SR-A# echo "link failed at line 9"',
+        'Executed 3 lines in 0.0 seconds from file cf3:/ok.cfg'],
+    'cf3:/bad.cfg': [
+        'A:SR-A# configure router interface "to-0"',
+        'A:SR-A>config>router>if# shutdwn',
+        'Error: Bad command.',
+        'MINOR: CLI Execution of "cf3:/bad.cfg" failed at line 2.'],
+    'cf3:/missing.cfg': [
+        'MINOR: CLI Could not access "cf3:/missing.cfg".'],
+}
+
+
+@pytest.fixture(scope='module')
+def fake():
+    transcript = synthetic_transcript(interfaces=2, arp_entries=2, bgp_peers=1)
+    for path, lines in EXEC_OUTPUTS.items():
+        transcript['exec -echo {}'.format(path)] = '\n'.join(lines)
+    files = {'cf3:/ok.cfg': b'\n'.join([b'configure router interface "to-0"'] * 3),
+             'cf3:/bad.cfg': b'configure router interface "to-0"\nshutdwn\n'}
+    with SROSFakeDevice(transcript, files=files) as device:
+        yield device
+
+
+def run_sync(fake, path):
+    driver = SROSDriver('127.0.0.1', 'admin', 'admin',
+                        optional_args={'port': fake.port, 'idle_timeout': IDLE_TIMEOUT})
+    driver.open()
+    try:
+        progress = []
+        start = time.time()
+        report = driver.exec_file_report(path, progress=lambda line, text: progress.append(line))
+        elapsed = time.time() - start
+        # the session is still in step with the prompt
+        assert 'Chassis Information' in driver.command('/show chassis')
+        return report, progress, elapsed
+    finally:
+        driver.close()
+
+
+def run_async(fake, path):
+    async def run():
+        driver = AsyncSROSDriver('127.0.0.1', 'admin', 'admin',
+                                 optional_args={'port': fake.port, 'idle_timeout': IDLE_TIMEOUT})
+        await driver.open()
+        try:
+            progress = []
+            start = time.time()
+            report = await driver.exec_file_report(path, progress=lambda line, text: progress.append(line))
+            elapsed = time.time() - start
+            assert 'Chassis Information' in await driver.command('/show chassis')
+            return report, progress, elapsed
+        finally:
+            await driver.close()
+    return asyncio.run(run())
+
+
+@pytest.fixture(params=[run_sync, run_async], ids=['sync', 'async'])
+def run(request, fake):
+    return lambda path: request.param(fake, path)
+
+
+def test_success(run):
+    report, progress, elapsed = run('cf3:/ok.cfg')
+    assert report['success'] is True
+    assert report['executed_lines'] == 3
+    assert report['errors'] == []
+    assert max(progress) == 3
+    assert elapsed < IDLE_TIMEOUT
+
+
+def test_failure_at_line(run):
+    report, _, elapsed = run('cf3:/bad.cfg')
+    assert report['success'] is False
+    assert report['executed_lines'] == 2
+    assert report['errors'] == [{'line': 2, 'error': 'Error: Bad command.'}]
+    assert elapsed < IDLE_TIMEOUT
+
+
+def test_file_cannot_be_opened(run):
+    report, _, elapsed = run('cf3:/missing.cfg')
+    assert report['success'] is False
+    assert report['errors'] == [{'line': 0, 'error': 'MINOR: CLI Could not access "cf3:/missing.cfg".'}]
+    assert 'Could not access' in report['output']
+    assert elapsed < IDLE_TIMEOUT
@@ -0,0 +1,45 @@
+"""SROSFleet overlaps the CLI waits of many devices, so throughput rises with the worker count."""
+
+import time
+
+import pytest
+
+from SROSFakeDevice import SROSFakeDevice, synthetic_transcript
+from SROSFleet import SROSFleet
+
+DEVICES = 8
+LATENCY = 0.1
+
+
+@pytest.fixture(scope='module')
+def inventory():
+    names = ['SR-{}'.format(i) for i in range(DEVICES)]
+    fakes = [SROSFakeDevice(synthetic_transcript(interfaces=5, arp_entries=5, bgp_peers=2, hostname=name),
+                            hostname=name, latency=LATENCY) for name in names]
+    for fake in fakes:
+        fake.start()
+    try:
+        yield [{'hostname': '127.0.0.1', 'username': 'admin', 'password': 'admin',
+                'optional_args': {'port': fake.port}} for fake in fakes]
+    finally:
+        for fake in fakes:
+            fake.stop()
+
+
+def throughput(inventory, workers):
+    """Devices per second collecting get_facts with `workers` threads."""
+    # every fake device listens on 127.0.0.1, so lift the per-hostname limit
+    fleet = SROSFleet(inventory, workers=workers, per_device_limit=DEVICES)
+    start = time.time()
+    results = list(fleet.run(['get_facts']))
+    elapsed = time.time() - start
+    assert [result.errors for result in results] == [{}] * DEVICES
+    assert sorted(result.results['get_facts']['hostname'] for result in results) == \
+        ['SR-{}'.format(i) for i in range(DEVICES)]
+    return DEVICES / elapsed
+
+
+def test_throughput_rises_with_workers(inventory):
+    one, two, eight = [throughput(inventory, workers) for workers in (1, 2, 8)]
+    assert two > 1.5 * one
+    assert eight > 2 * two
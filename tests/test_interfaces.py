@@ -0,0 +1,94 @@
+"""InterfaceTable cuts `show router interface` rows at the header's column offsets, whatever their widths."""
+
+import pytest
+
+from SROSDriver import InterfaceTable, SROSDriver
+from SROSFakeDevice import RULE, SEPARATOR, SROSFakeDevice, synthetic_transcript
+from SROSRecords import Interface
+
+
+def row(name, adm, opr, mode, port=''):
+    """An interface line of a release with wider columns than synthetic_interfaces()."""
+    return '{:<40} {:<11} {:<13} {:<8} {}'.format(name, adm, opr, mode, port).rstrip()
+
+
+WIDE = [
+    SEPARATOR, 'Interface Table (Router: Base)', SEPARATOR,
+    row('Interface-Name', 'Adm', 'Opr(v4/v6)', 'Mode', 'Port/SapId'),
+    '   IP-Address                                                                PfxState',
+    RULE,
+    row('system', 'Up', 'Up/Down', 'Network', 'system'),
+    '   10.0.0.1/32                                                               n/a',
+    row('to core via 1/1/1', 'Up', 'Down/Down', 'Network', '1/1/1'),
+    '   10.1.0.0/31                                                               n/a',
+    row('to-edge', 'Down', 'Down/Down', 'Network'),
+    'a-very-long-interface-name-that-runs-past-the-column',
+    row('', 'Up', 'Up/Up', 'VPRN', 'lag-1:100'),
+    '   10.2.0.0/31                                                               n/a',
+    '   10.2.0.8/31                                                               n/a',
+    '   2001:db8::1/64                                                            PREFERRED',
+    RULE, 'Interfaces : 4', SEPARATOR,
+]
+
+WIDE_INTERFACES = [
+    Interface('system', 'Up', 'Up', 'Down', 'Network', '10.0.0.1/32', 'system'),
+    Interface('to core via 1/1/1', 'Up', 'Down', 'Down', 'Network', '10.1.0.0/31', '1/1/1'),
+    Interface('to-edge', 'Down', 'Down', 'Down', 'Network', False, False),
+    Interface('a-very-long-interface-name-that-runs-past-the-column', 'Up', 'Up', 'Up', 'VPRN',
+              '10.2.0.0/31', 'lag-1:100'),
+]
+
+# an older release: narrower columns and no Port/SapId column at all
+NARROW = [
+    SEPARATOR, 'Interface Table (Router: Base)', SEPARATOR,
+    'Interface-Name            Adm  Opr(v4/v6) Mode',
+    '   IP-Address                                  PfxState',
+    RULE,
+    'system                    Up   Up/Down    Network',
+    '   10.0.0.1/32                                 n/a',
+    'to-1                      Down Down       Network',
+    RULE, 'Interfaces : 2', SEPARATOR,
+]
+
+NARROW_INTERFACES = [
+    Interface('system', 'Up', 'Up', 'Down', 'Network', '10.0.0.1/32', False),
+    Interface('to-1', 'Down', 'Down', False, 'Network', False, False),
+]
+
+
+def parse(lines):
+    table = InterfaceTable()
+    rows = [table.feed(line) for line in lines] + [table.close()]
+    return table, [row for row in rows if row is not None]
+
+
+def test_shifted_columns():
+    table, interfaces = parse(WIDE)
+    assert table.offsets == [0, 41, 53, 67, 76]
+    assert interfaces == WIDE_INTERFACES
+    assert parse([line + '\r' for line in WIDE])[1] == WIDE_INTERFACES
+
+
+def test_missing_optional_column():
+    table, interfaces = parse(NARROW)
+    assert table.offsets == [0, 26, 31, 42]
+    assert interfaces == NARROW_INTERFACES
+
+
+@pytest.fixture(scope='module')
+def fake():
+    transcript = synthetic_transcript(interfaces=2, arp_entries=2, bgp_peers=1)
+    transcript['show router interface exclude-services'] = '\n'.join(WIDE)
+    with SROSFakeDevice(transcript) as device:
+        yield device
+
+
+def test_get_interfaces(fake):
+    driver = SROSDriver('127.0.0.1', 'admin', 'admin', optional_args={'port': fake.port})
+    driver.open()
+    try:
+        expected = Interface.to_napalm(WIDE_INTERFACES)
+        assert driver.get_interfaces() == expected
+        assert dict(driver.iter_interfaces()) == expected
+    finally:
+        driver.close()
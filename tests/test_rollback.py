@@ -0,0 +1,115 @@
+"""rollback_view() and rollback_compare(): RollbackIndex and ConfigDiff on a fake checkpoint listing and diff."""
+
+import pytest
+
+from SROSDriver import ConfigDiff, RollbackIndex, SROSDriver
+from SROSFakeDevice import RULE, SEPARATOR, SROSFakeDevice, synthetic_transcript
+from SROSRecords import ConfigHunk, RollbackEntry
+
+VIEW = [
+    SEPARATOR, 'Rollback Information', SEPARATOR,
+    'Rollback Location            : cf3:/rollback/rb',
+    'Max Local  Rollback Files    : 10',
+    'Save',
+    '    Last Time                : 2016/06/10 10:43:00 UTC',
+    RULE, 'Rollback Files', RULE,
+    'Idx    Suffix     Comment',
+    '       Date       Time',
+    RULE,
+    'latest .rb        before maintenance window',
+    '       2016/06/10 10:43:00 UTC',
+    '1      .rb.1',
+    '       2016/06/09  09:12:45 UTC',
+    'rescue .rc        rescue point',
+    '       2016/06/01 08:00:00',
+    RULE,
+]
+
+# `admin rollback compare 1 to latest`: checkpoint 1 is the old side, latest the new one
+COMPARE = [
+    'Processing "cf3:/rollback/rb.1"... 0.200 s',
+    'Processing "cf3:/rollback/rb"... 0.210 s',
+    '    configure',
+    '        router Base',
+    '            interface "to-0"',
+    '-               address 10.0.0.0/31',
+    '+               address 10.0.0.2/31',
+    '+               description "moved"',
+    '            exit',
+    '            interface "to-1"',
+    '-               shutdown',
+    '+               no shutdown',
+    '            exit',
+    '            bgp',
+    '                group "ebgp"',
+    '-                   multipath 2',
+    '                exit',
+    '            exit',
+    '        exit',
+    '        system',
+    '            name "SR-A"',
+    '+           location "lab"',
+    '        exit',
+    '    exit',
+    'Finished in 0.010 s',
+]
+
+ENTRIES = [
+    RollbackEntry('latest', '.rb', '2016/06/10 10:43:00 UTC', 'before maintenance window'),
+    RollbackEntry('1', '.rb.1', '2016/06/09 09:12:45 UTC', ''),
+    RollbackEntry('rescue', '.rc', '2016/06/01 08:00:00', 'rescue point'),
+]
+
+HUNKS = [
+    ConfigHunk(('configure', 'router Base', 'interface "to-0"'),
+               ('address 10.0.0.0/31',), ('address 10.0.0.2/31', 'description "moved"')),
+    ConfigHunk(('configure', 'router Base', 'interface "to-1"'), ('shutdown',), ('no shutdown',)),
+    ConfigHunk(('configure', 'router Base', 'bgp', 'group "ebgp"'), ('multipath 2',), ()),
+    ConfigHunk(('configure', 'system'), (), ('location "lab"',)),
+]
+
+
+def parse(parser, lines):
+    records = [parser.feed(line) for line in lines] + [parser.close()]
+    return [record for record in records if record is not None]
+
+
+def test_rollback_index():
+    assert parse(RollbackIndex(), VIEW) == ENTRIES
+    assert parse(RollbackIndex(), [line + '\r' for line in VIEW]) == ENTRIES
+
+
+def test_config_diff_between_checkpoints():
+    assert parse(ConfigDiff(), COMPARE) == HUNKS
+    assert parse(ConfigDiff(), [line + '\r' for line in COMPARE]) == HUNKS
+    assert parse(ConfigDiff(), COMPARE[:2] + COMPARE[-1:]) == []
+
+
+@pytest.fixture(scope='module')
+def fake():
+    transcript = synthetic_transcript(interfaces=2, arp_entries=2, bgp_peers=1)
+    transcript['admin rollback view'] = '\n'.join(VIEW)
+    transcript['admin rollback compare 1 to active-cfg'] = '\n'.join(COMPARE)
+    with SROSFakeDevice(transcript) as device:
+        yield device
+
+
+@pytest.fixture(params=['dict', 'records'])
+def driver(request, fake):
+    driver = SROSDriver('127.0.0.1', 'admin', 'admin',
+                        optional_args={'port': fake.port, 'result_format': request.param})
+    driver.open()
+    yield driver
+    driver.close()
+
+
+def test_rollback_view(driver):
+    expected = ENTRIES if driver.result_format == 'records' else RollbackEntry.to_napalm(ENTRIES)
+    assert driver.rollback_view() == expected
+    assert list(driver.iter_rollback_view()) == expected
+
+
+def test_rollback_compare(driver):
+    expected = HUNKS if driver.result_format == 'records' else ConfigHunk.to_napalm(HUNKS)
+    assert driver.rollback_compare(1) == expected
+    assert list(driver.iter_rollback_compare(1)) == expected
@@ -0,0 +1,109 @@
+"""SnapshotStore: the .dat/.idx files, reopening, torn index entries and concurrent appends."""
+
+import os
+import threading
+
+import pytest
+
+from SROSSnapshots import INDEX, Snapshot, SnapshotStore
+
+
+@pytest.fixture
+def path(tmpdir):
+    return str(tmpdir.join('snapshots'))
+
+
+def fill(store, hostname='r1', getter='get_facts', count=5):
+    for i in range(count):
+        store.append(hostname, getter, {'uptime': i, 'interface': ['to-{}'.format(i)]}, timestamp=100.0 + i)
+
+
+def test_reopen_point_and_range_reads(path):
+    fill(SnapshotStore(path))
+    fill(SnapshotStore(path), hostname='r2/x', getter='get_bgp_neighbors(vrf=all)', count=2)
+    store = SnapshotStore(path)
+    assert store.devices() == ['r1', 'r2/x']
+    assert store.getters('r2/x') == ['get_bgp_neighbors(vrf=all)']
+    assert store.timestamps('r1', 'get_facts') == [100.0, 101.0, 102.0, 103.0, 104.0]
+
+    assert store.at('r1', 'get_facts', 99.9) is None
+    assert store.at('r1', 'get_facts', 102.0) == Snapshot('r1', 'get_facts', 102.0,
+                                                          {'uptime': 2, 'interface': ['to-2']})
+    assert store.at('r1', 'get_facts', 102.5).timestamp == 102.0
+    assert store.at('r1', 'get_facts', 1e12).result['uptime'] == 4
+    assert store.at('r1', 'get_arp_table', 1e12) is None
+    assert store.at('r3', 'get_facts', 1e12) is None
+
+    assert [s.timestamp for s in store.range('r1', 'get_facts', 101.0, 103.0)] == [101.0, 102.0, 103.0]
+    assert [s.timestamp for s in store.range('r1', 'get_facts', 101.5)] == [102.0, 103.0, 104.0]
+    assert [s.result['uptime'] for s in store.range('r1', 'get_facts', end=100.5)] == [0]
+    assert list(store.range('r1', 'get_facts', 200.0)) == []
+
+    fleet = store.fleet_at('get_facts', 101.0)
+    assert list(fleet) == ['r1']
+    assert fleet['r1'].result['uptime'] == 1
+
+
+def test_append_older_than_last_is_refused(path):
+    store = SnapshotStore(path)
+    fill(store)
+    with pytest.raises(ValueError):
+        store.append('r1', 'get_facts', {}, timestamp=50.0)
+    assert store.append('r1', 'get_facts', {'uptime': 9}, timestamp=104.0) == 104.0
+    assert len(store.timestamps('r1', 'get_facts')) == 6
+
+
+def test_torn_index_entry(path):
+    store = SnapshotStore(path)
+    fill(store)
+    data_path, index_path = store._paths('r1', 'get_facts')
+    data_size = os.path.getsize(data_path)
+    # a crash while writing the last index entry: its record is in the data file, half of its entry is not
+    with open(index_path, 'r+b') as index:
+        index.truncate(4 * INDEX.size + INDEX.size // 2)
+
+    store = SnapshotStore(path)
+    assert store.timestamps('r1', 'get_facts') == [100.0, 101.0, 102.0, 103.0]
+    assert store.at('r1', 'get_facts', 1e12).result['uptime'] == 3
+    assert [s.result['uptime'] for s in store.range('r1', 'get_facts')] == [0, 1, 2, 3]
+
+    # the next append drops the half entry and leaves the unindexed record unread
+    store.append('r1', 'get_facts', {'uptime': 10}, timestamp=110.0)
+    assert os.path.getsize(index_path) == 5 * INDEX.size
+    assert os.path.getsize(data_path) > data_size
+    assert store.timestamps('r1', 'get_facts') == [100.0, 101.0, 102.0, 103.0, 110.0]
+    assert store.at('r1', 'get_facts', 109.0).result['uptime'] == 3
+    assert store.at('r1', 'get_facts', 110.0).result == {'uptime': 10}
+
+
+def test_empty_index(path):
+    store = SnapshotStore(path)
+    fill(store, count=1)
+    with open(store._paths('r1', 'get_facts')[1], 'r+b') as index:
+        index.truncate(INDEX.size // 2)
+    assert SnapshotStore(path).at('r1', 'get_facts', 1e12) is None
+    assert SnapshotStore(path).timestamps('r1', 'get_facts') == []
+
+
+def test_concurrent_appends_stay_in_order(path):
+    store = SnapshotStore(path)
+    threads, appends = 8, 200
+
+    def append(worker):
+        for i in range(appends):
+            store.append('r1', 'get_facts', {'worker': worker, 'i': i})
+
+    workers = [threading.Thread(target=append, args=(worker,)) for worker in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    store = SnapshotStore(path)
+    timestamps = store.timestamps('r1', 'get_facts')
+    assert len(timestamps) == threads * appends
+    assert timestamps == sorted(timestamps)
+    snapshots = list(store.range('r1', 'get_facts'))
+    assert [s.timestamp for s in snapshots] == timestamps
+    for worker in range(threads):
+        assert [s.result['i'] for s in snapshots if s.result['worker'] == worker] == list(range(appends))